@@ -16,11 +16,17 @@ import logging
 import re
 from datetime import datetime, timedelta
 from collections import defaultdict
-from sqlalchemy import inspect, text, or_
+from sqlalchemy import inspect, text, or_, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only, noload
+from sqlalchemy.orm.attributes import set_committed_value
 from config import config
 from price_client import HybridPriceService
-from models import db, User, Portfolio, Transaction, PriceData, Asset, Settlement, current_utc
+from json_utils import FastJSONProvider
+from models import (
+    db, User, Portfolio, Transaction, PriceData, Asset, Settlement, current_utc, enable_lazy_load_guard,
+    utc_timestamp,
+)
 from asset_manager import AssetManager
 from validators import (
     ValidationError as InputValidationError,
@@ -57,10 +63,13 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     
     # Load configuration
-    app.config.from_object(config[config_name])
+    app.config.update(config[config_name].as_mapping())
+    app.json = FastJSONProvider(app)
     
     # Initialize database
     db.init_app(app)
+    if app.config.get('RAISE_ON_LAZY_LOAD'):
+        enable_lazy_load_guard()
     
     return app
 
@@ -70,6 +79,37 @@ app = create_app(config_name)
 socketio = SocketIO(app)
 
 
+def ensure_asset_expiry_epoch():
+    """Ensure assets has the expires_at_ts epoch column and backfill it from expires_at."""
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+            if 'assets' not in inspector.get_table_names():
+                return
+
+            column_names = {col['name'] for col in inspector.get_columns('assets')}
+            if 'expires_at_ts' not in column_names:
+                logger.info("Adding expires_at_ts column to assets table")
+                with db.engine.begin() as conn:
+                    conn.execute(text('ALTER TABLE assets ADD COLUMN expires_at_ts FLOAT'))
+
+            missing = db.session.query(Asset.id, Asset.expires_at).filter(Asset.expires_at_ts.is_(None)).all()
+            if missing:
+                logger.info("Backfilling expires_at_ts for %d assets", len(missing))
+                db.session.bulk_update_mappings(Asset, [
+                    {'id': asset_id, 'expires_at_ts': utc_timestamp(expires_at)}
+                    for asset_id, expires_at in missing
+                ])
+                db.session.commit()
+
+        except SQLAlchemyError as exc:
+            logger.error("Asset expiry column synchronization failed: %s", exc)
+            db.session.rollback()
+
+
+ensure_asset_expiry_epoch()
+
+
 def ensure_transaction_asset_schema():
     """Ensure transactions table has asset_id column and backfill values."""
     with app.app_context():
@@ -137,6 +177,15 @@ def ensure_settlement_asset_schema():
                 with db.engine.begin() as conn:
                     conn.execute(text('ALTER TABLE settlements ADD COLUMN symbol VARCHAR(10)'))
 
+            if 'color' not in column_names:
+                logger.info("Adding denormalized color column to settlements table")
+                with db.engine.begin() as conn:
+                    conn.execute(text('ALTER TABLE settlements ADD COLUMN color VARCHAR(7)'))
+                    conn.execute(text(
+                        'UPDATE settlements SET color = '
+                        '(SELECT assets.color FROM assets WHERE assets.id = settlements.asset_id)'
+                    ))
+
             missing_asset_ids = Settlement.query.filter(Settlement.asset_id.is_(None)).all()
             if missing_asset_ids:
                 logger.info("Backfilling asset_id for %d settlement records", len(missing_asset_ids))
@@ -206,6 +255,31 @@ def ensure_asset_symbol_not_unique():
 
 ensure_asset_symbol_not_unique()
 
+
+def ensure_performance_indexes():
+    """Create query-supporting indexes that create_all() does not add to existing tables."""
+    with app.app_context():
+        try:
+            table_names = set(inspect(db.engine).get_table_names())
+
+            with db.engine.begin() as conn:
+                if 'assets' in table_names:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_asset_active_expiry ON assets(is_active, expires_at)'
+                    ))
+                    # Superseded by ix_asset_active_expiry, which shares their leading column
+                    conn.execute(text('DROP INDEX IF EXISTS ix_assets_is_active'))
+                    conn.execute(text('DROP INDEX IF EXISTS idx_assets_active'))
+                if 'transactions' in table_names:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_tx_user_time ON transactions(user_id, timestamp)'
+                    ))
+        except SQLAlchemyError as exc:
+            logger.error("Index synchronization failed: %s", exc)
+
+
+ensure_performance_indexes()
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -429,8 +503,8 @@ def register():
     if form.validate_on_submit():
         username = form.username.data
         
-        # Check if user already exists
-        if User.query.filter_by(username=username).first():
+        # Check if user already exists (EXISTS avoids loading the user and its selectin portfolio)
+        if db.session.query(db.exists().where(User.username == username)).scalar():
             flash('Username already exists')
             return render_template('register.html', form=form)
         
@@ -1157,6 +1231,7 @@ def get_assets():
     """Get current asset prices and expiration info for active assets."""
     # Get active assets from database (only those not yet expired)
     now = current_utc()
+    now_ts = utc_timestamp(now)
     active_assets = Asset.query.filter_by(is_active=True).filter(Asset.expires_at > now).all()
     
     # Get current prices from price service
@@ -1166,14 +1241,15 @@ def get_assets():
     assets_data = {}
     for asset in active_assets:
         price = current_prices.get(asset.symbol, {}).get('price', asset.current_price)
+        created_iso, expires_iso = asset.iso_times()
         assets_data[asset.symbol] = {
             'price': price,
-            'expires_at': asset.expires_at.isoformat(),
-            'time_to_expiry_seconds': asset.time_to_expiry().total_seconds() if asset.time_to_expiry() else 0,
+            'expires_at': expires_iso,
+            'time_to_expiry_seconds': asset.seconds_to_expiry(now_ts),
             'initial_price': asset.initial_price,
             'volatility': asset.volatility,
             'color': asset.color,
-            'created_at': asset.created_at.isoformat()
+            'created_at': created_iso
         }
     
     return jsonify(assets_data)
@@ -1215,10 +1291,18 @@ def get_settlements():
         logger.warning(f"Invalid limit parameter for user {current_user.id} in settlements: {ve}")
         return jsonify({'error': f'Invalid limit: {str(ve)}'}), 400
     
-    settlements = Settlement.query.filter_by(user_id=current_user.id).order_by(Settlement.settled_at.desc()).limit(limit).all()
+    # Symbol and color are stored on the settlement row, so skip the default join to assets
+    settlements = (
+        Settlement.query.options(noload(Settlement.asset))
+        .filter_by(user_id=current_user.id)
+        .order_by(Settlement.settled_at.desc())
+        .limit(limit)
+        .all()
+    )
     
     return jsonify([{
-        'symbol': s.symbol,
+        'symbol': s.legacy_symbol,
+        'color': s.color,
         'quantity': s.quantity,
         'settlement_price': s.settlement_price,
         'settlement_value': s.settlement_value,
@@ -1233,8 +1317,8 @@ def get_open_interest():
     id_to_symbol = {asset.id: asset.symbol for asset in active_assets}
     open_interest = {asset_id: 0 for asset_id in id_to_symbol.keys()}
     
-    # Sum holdings across all users
-    portfolios = Portfolio.query.all()
+    # Sum holdings across all users (only the holdings blob is needed)
+    portfolios = Portfolio.query.options(load_only(Portfolio.id, Portfolio.holdings)).all()
     for portfolio in portfolios:
         holdings = portfolio.get_holdings()
         for asset_id, quantity in holdings.items():
@@ -1501,6 +1585,7 @@ def update_prices():
             # Get active assets and sync with price service
             # Double-check they're actually active and not expired
             now = current_utc()
+            now_ts = utc_timestamp(now)
             active_assets = Asset.query.filter_by(is_active=True).filter(Asset.expires_at > now).all()
             
             # Sync price service with active assets from database
@@ -1514,29 +1599,34 @@ def update_prices():
             
             # Enrich price data with expiration info
             enriched_prices = {}
+            price_rows = []
             for asset in active_assets:
                 if asset.symbol in current_prices:
                     price = current_prices[asset.symbol]['price']
                     
-                    # Update database with current price
-                    asset.current_price = price
+                    # Queue database price update; mirror it on the instance without dirtying it
+                    price_rows.append({'id': asset.id, 'current_price': price})
+                    set_committed_value(asset, 'current_price', price)
                     
                     # Check if asset has fallen below worthless threshold
                     if price < 0.01:
                         logger.warning(f"Asset {asset.symbol} dropped to ${price:.4f} - will be auto-settled")
                         worthless_assets.append(asset)
                     
+                    created_iso, expires_iso = asset.iso_times()
                     enriched_prices[asset.symbol] = {
                         'price': price,
-                        'expires_at': asset.expires_at.isoformat(),
-                        'time_to_expiry_seconds': asset.time_to_expiry().total_seconds() if asset.time_to_expiry() else 0,
+                        'expires_at': expires_iso,
+                        'time_to_expiry_seconds': asset.seconds_to_expiry(now_ts),
                         'initial_price': asset.initial_price,
                         'volatility': asset.volatility,
                         'color': asset.color,
-                        'created_at': asset.created_at.isoformat()
+                        'created_at': created_iso
                     }
             
-            # Commit price updates to database
+            # Commit price updates to database as one executemany UPDATE keyed by id
+            if price_rows:
+                db.session.execute(update(Asset), price_rows)
             db.session.commit()
             
             # Process worthless assets immediately if any found
@@ -1545,7 +1635,7 @@ def update_prices():
                 
                 # Mark them as expired with their worthless price
                 for asset in worthless_assets:
-                    asset.expire(final_price=asset.current_price)
+                    asset.expire(final_price=asset.current_price, now=now)
                 db.session.commit()
                 
                 # Settle positions
@@ -5,11 +5,15 @@ Handles creation, expiration, settlement, and automatic replacement.
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
+from sqlalchemy import insert
 from models import db, Asset, Settlement, Portfolio, Transaction, User, current_utc
 import time
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on rows sent per executemany batch when inserting settlement rows
+SETTLEMENT_INSERT_BATCH_SIZE = 5000
+
 
 class AssetManager:
     """Manages the lifecycle of assets with expiration dates."""
@@ -78,10 +82,11 @@ class AssetManager:
             List of newly expired assets
         """
         expired_assets = self.get_expired_assets(unsettled_only=True)
+        now = current_utc()  # One timestamp for the whole sweep
         
         for asset in expired_assets:
             logger.info(f"Expiring asset {asset.symbol} at price {asset.current_price}")
-            asset.expire(final_price=asset.current_price)
+            asset.expire(final_price=asset.current_price, now=now)
         
         if expired_assets:
             db.session.commit()
@@ -103,11 +108,12 @@ class AssetManager:
             return []
         
         logger.info(f"Found {len(worthless_assets)} asset(s) below ${threshold:.2f} threshold")
+        now = current_utc()
         
         for asset in worthless_assets:
             logger.warning(f"Auto-settling {asset.symbol} - price ${asset.current_price:.4f} below ${threshold:.2f} threshold")
             # Expire with current (worthless) price as final price
-            asset.expire(final_price=asset.current_price)
+            asset.expire(final_price=asset.current_price, now=now)
         
         if worthless_assets:
             db.session.commit()
@@ -129,6 +135,9 @@ class AssetManager:
             'total_value_settled': 0.0,
             'transactions': []  # Store transaction data for later emission
         }
+        # Settlement and history rows for every asset, inserted together after the loop
+        settlement_rows = []
+        transaction_rows = []
         
         for asset in expired_assets:
             if not asset.final_price:
@@ -145,16 +154,16 @@ class AssetManager:
                     quantity = holdings[asset.id]
                     settlement_value = quantity * asset.final_price
                     
-                    # Create settlement record
-                    settlement = Settlement(
-                        user_id=portfolio.user_id,
-                        asset_id=asset.id,
-                        legacy_symbol=asset.symbol,
-                        quantity=quantity,
-                        settlement_price=asset.final_price,
-                        settlement_value=settlement_value
-                    )
-                    db.session.add(settlement)
+                    # Queue settlement record (inserted in bulk after the loop)
+                    settlement_rows.append({
+                        'user_id': portfolio.user_id,
+                        'asset_id': asset.id,
+                        'legacy_symbol': asset.symbol,
+                        'quantity': quantity,
+                        'settlement_price': asset.final_price,
+                        'settlement_value': settlement_value,
+                        'color': asset.color
+                    })
                     
                     # Return cash to user
                     portfolio.cash += settlement_value
@@ -171,28 +180,28 @@ class AssetManager:
                         del position_info[asset.id]
                         portfolio.set_position_info(position_info)
                     
-                    # Create settlement transaction for history
-                    transaction = Transaction(
-                        user_id=portfolio.user_id,
-                        asset_id=asset.id,
-                        legacy_symbol=asset.symbol,
-                        timestamp=time.time() * 1000,
-                        type='settlement',
-                        quantity=quantity,
-                        price=asset.final_price,
-                        total_cost=settlement_value
-                    )
-                    db.session.add(transaction)
+                    # Queue settlement transaction for history (inserted in bulk after the loop)
+                    transaction_row = {
+                        'user_id': portfolio.user_id,
+                        'asset_id': asset.id,
+                        'legacy_symbol': asset.symbol,
+                        'timestamp': time.time() * 1000,
+                        'type': 'settlement',
+                        'quantity': quantity,
+                        'price': asset.final_price,
+                        'total_cost': settlement_value
+                    }
+                    transaction_rows.append(transaction_row)
                     
                     # Store transaction data for emission after commit
                     transaction_data = {
-                        'timestamp': transaction.timestamp,
+                        'timestamp': transaction_row['timestamp'],
                         'symbol': asset.symbol,
-                        'type': transaction.type,
-                        'quantity': transaction.quantity,
-                        'price': transaction.price,
-                        'total_cost': transaction.total_cost,  # Use total_cost not total!
-                        'asset_id': transaction.asset_id,
+                        'type': transaction_row['type'],
+                        'quantity': transaction_row['quantity'],
+                        'price': transaction_row['price'],
+                        'total_cost': transaction_row['total_cost'],  # Use total_cost not total!
+                        'asset_id': transaction_row['asset_id'],
                         'user_id': portfolio.user_id,
                         'color': asset.color
                     }
@@ -205,34 +214,45 @@ class AssetManager:
             
             stats['assets_settled'] += 1
         
+        # One executemany per batch instead of one INSERT per row
+        for model, rows in ((Settlement, settlement_rows), (Transaction, transaction_rows)):
+            for start in range(0, len(rows), SETTLEMENT_INSERT_BATCH_SIZE):
+                db.session.execute(insert(model), rows[start:start + SETTLEMENT_INSERT_BATCH_SIZE])
+        
         db.session.commit()
         return stats
     
-    def create_new_assets(self, count: int = 1) -> List[Asset]:
+    def create_new_assets(self, count: int = 1, commit: bool = True) -> List[Asset]:
         """Create new assets with random expiration dates.
         
         Args:
             count: Number of assets to create
+            commit: Commit immediately; pass False to flush into the caller's transaction
         
         Returns:
             List of newly created Asset objects
         """
-        new_assets = []
-        
-        for _ in range(count):
-            asset = Asset.create_new_asset(
-                initial_price=self.initial_asset_price,
-                volatility=None,  # Random
-                minutes_to_expiry=None,  # Random
-                exclude_symbols=self.config.get('EXCLUDED_SYMBOLS', None) 
-            )
-            db.session.add(asset)
-            new_assets.append(asset)
-            
+        # Draw the batch's parameters and colors together and track batch symbols
+        # locally so the whole batch is flushed as a single multi-row INSERT at commit
+        active_colors = {
+            color for (color,) in db.session.query(Asset.color).filter(Asset.is_active)
+        }
+        new_assets = Asset.create_batch(
+            count,
+            initial_price=self.initial_asset_price,
+            active_colors=active_colors,
+            exclude_symbols=set(self.config.get('EXCLUDED_SYMBOLS', None) or ())
+        )
+        
+        for asset in new_assets:
             time_to_expiry = (asset.expires_at - current_utc()).total_seconds() / 60
             logger.info(f"Created new asset {asset.symbol} with volatility {asset.volatility:.4f}, expires in {time_to_expiry:.1f} minutes")
         
-        db.session.commit()
+        db.session.add_all(new_assets)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         
         # Register new assets with price service if available
         if self.price_service:
@@ -240,13 +260,11 @@ class AssetManager:
                 try:
                     # Add to price service's fallback (always available)
                     if hasattr(self.price_service, 'fallback'):
-                        self.price_service.fallback.assets[asset.symbol] = {
-                            'price': asset.current_price,
-                            'volatility': asset.volatility,
-                            'drift': asset.drift,
-                            'history': [],
-                            'last_update': None
-                        }
+                        # A recycled symbol must not keep the previous asset's price and parameters
+                        self.price_service.fallback.remove_asset(asset.symbol)
+                        self.price_service.fallback.add_asset(
+                            asset.symbol, asset.current_price, volatility=asset.volatility, drift=asset.drift
+                        )
                         logger.info(f"Registered {asset.symbol} with price service (volatility={asset.volatility:.4f}, drift={asset.drift:.6f})")
                 except Exception as e:
                     logger.error(f"Error registering asset {asset.symbol} with price service: {e}")
@@ -423,7 +441,8 @@ class AssetManager:
         expired_settled = self.get_expired_assets(unsettled_only=False)
         
         # Calculate average time to expiry for active assets
-        ttl_seconds = [ttl.total_seconds() for ttl in (a.time_to_expiry() for a in active_assets) if ttl]
+        now_ts = time.time()
+        ttl_seconds = [ttl for ttl in (a.seconds_to_expiry(now_ts) for a in active_assets) if ttl]
         avg_ttl = (sum(ttl_seconds) / len(ttl_seconds)) if ttl_seconds else 0
         
         return {
@@ -436,7 +455,7 @@ class AssetManager:
                 {
                     'symbol': a.symbol,
                     'expires_at': a.expires_at.isoformat(),
-                    'hours_remaining': (ttl.total_seconds() / 3600) if (ttl := a.time_to_expiry()) else 0
+                    'hours_remaining': a.seconds_to_expiry(now_ts) / 3600
                 }
                 for a in sorted(active_assets, key=lambda x: x.expires_at)[:5]
             ]
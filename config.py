@@ -1,12 +1,37 @@
 """
 Configuration settings for the Martingale trading application.
 """
+import functools
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+
+@functools.lru_cache(maxsize=1)
+def _db_url():
+    """Resolve DATABASE_URL once, normalizing Heroku's legacy postgres:// scheme."""
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///martingale.db'
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def _engine_options():
+    """Connection pool settings for server databases; SQLite keeps SQLAlchemy's defaults."""
+    if _db_url().startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 40)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 5)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
 class Config:
     """Base configuration class."""
     
@@ -23,11 +48,11 @@ class Config:
     WTF_CSRF_TIME_LIMIT = None  # CSRF tokens don't expire (only session lifetime matters)
     
     # Database configuration
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///martingale.db'
-    # Fix for Heroku postgres URL
-    if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
-        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://')
+    SQLALCHEMY_DATABASE_URI = _db_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options()
+    # Strict mode: lazy relationship loads raise so N+1 query patterns fail loudly
+    RAISE_ON_LAZY_LOAD = bool(os.environ.get('RAISE_ON_LAZY_LOAD', 'False').lower() in ['true', '1', 'yes'])
     
     # Application settings
     INITIAL_CASH = float(os.environ.get('INITIAL_CASH', 100000))
@@ -70,6 +95,25 @@ class Config:
 
     EXCLUDED_SYMBOLS = str(os.environ.get('EXCLUDED_SYMBOLS', '')).split(' ')
 
+    @classmethod
+    def as_mapping(cls):
+        """Return this configuration's uppercase settings as a read-only mapping.
+
+        Values are fixed at import time, so the dir()/getattr() walk that
+        ``app.config.from_object`` performs is done once per class and reused.
+        """
+        return _config_mapping(cls)
+
+
+@functools.lru_cache(maxsize=None)
+def _config_mapping(config_class):
+    return MappingProxyType({
+        key: getattr(config_class, key)
+        for key in dir(config_class)
+        if key.isupper()
+    })
+
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
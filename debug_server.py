@@ -7,47 +7,52 @@ import sys
 import logging
 from dotenv import load_dotenv
 
-# Load local environment variables FIRST
-load_dotenv('.env')
+LOGGER = logging.getLogger(__name__)
 
-# Ensure we're in development mode
-os.environ['FLASK_ENV'] = 'development'
-os.environ['FLASK_DEBUG'] = 'True'
+def configure_debug_environment():
+    """Load .env, force development settings, and enable verbose logging.
 
-# Ensure DATABASE_URL is set for local development  
-os.environ['DATABASE_URL'] = 'sqlite:///martingale.db'
+    Kept out of module scope so importing this file has no side effects on
+    os.environ, the root logger, or debug.log.
+    """
+    # Load local environment variables FIRST
+    load_dotenv('.env')
 
-# Ensure SECRET_KEY is set
-if 'SECRET_KEY' not in os.environ:
-    os.environ['SECRET_KEY'] = 'dev-secret-key-for-local-development'
+    # Ensure we're in development mode
+    os.environ['FLASK_ENV'] = 'development'
+    os.environ['FLASK_DEBUG'] = 'True'
 
-# Set up enhanced logging for debugging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('debug.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+    # Ensure DATABASE_URL is set for local development  
+    os.environ['DATABASE_URL'] = 'sqlite:///martingale.db'
 
-print("🔧 Environment setup:")
-print(f"   FLASK_ENV: {os.environ.get('FLASK_ENV')}")
-print(f"   DATABASE_URL: {os.environ.get('DATABASE_URL')}")
-print(f"   SECRET_KEY: {'SET' if os.environ.get('SECRET_KEY') else 'NOT SET'}")
+    # Ensure SECRET_KEY is set
+    if 'SECRET_KEY' not in os.environ:
+        os.environ['SECRET_KEY'] = 'dev-secret-key-for-local-development'
 
-# Import your main app AFTER environment setup
-try:
-    from app import app, socketio
-    print("✅ App imported successfully")
-except Exception as e:
-    print(f"❌ Error importing app: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+    # Set up enhanced logging for debugging
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('debug.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    print("🔧 Environment setup:")
+    print(f"   FLASK_ENV: {os.environ.get('FLASK_ENV')}")
+    print(f"   DATABASE_URL: {os.environ.get('DATABASE_URL')}")
+    print(f"   SECRET_KEY: {'SET' if os.environ.get('SECRET_KEY') else 'NOT SET'}")
 
 def run_debug_server():
     """Run the application in debug mode with enhanced error handling."""
+    # Import your main app AFTER environment setup
+    try:
+        from app import app, socketio
+        print("✅ App imported successfully")
+    except Exception:
+        LOGGER.exception("Error importing app")
+        sys.exit(1)
     
     print("🚀 Starting Martingale in DEBUG mode...")
     print(f"📁 Working directory: {os.getcwd()}")
@@ -64,28 +69,13 @@ def run_debug_server():
         else:
             print(f"❌ Missing: {file_path}")
     
-    # Initialize the database
+    # Initialize the database through the shared initializer (non-destructive)
     print("\n🔧 Setting up database...")
-    with app.app_context():
-        from models import db, PriceData
-        db.create_all()
-        print("✅ Database tables created successfully")
-        
-        # Initialize default price data in database if needed
-        if PriceData.query.count() == 0:
-            print("� Initializing price data in database...")
-            for symbol, config_data in app.config['ASSETS'].items():
-                price_data = PriceData(
-                    symbol=symbol,
-                    current_price=config_data['price'],
-                    volatility=config_data['volatility'],
-                    history='[]'
-                )
-                db.session.add(price_data)
-            db.session.commit()
-            print(f"✅ Initialized {len(app.config['ASSETS'])} assets in database")
-        else:
-            print(f"✅ Found {PriceData.query.count()} assets in database")
+    from init_database import main as init_database_main
+    if init_database_main(['--env', 'development', '--no-reset', '--skip-asset-seed']) != 0:
+        LOGGER.error("Database setup failed")
+        sys.exit(1)
+    print("✅ Database ready")
     
     # Run the app
     try:
@@ -107,9 +97,9 @@ def run_debug_server():
         
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
-    except Exception as e:
-        print(f"❌ Error starting server: {e}")
-        logging.exception("Server startup error")
+    except Exception:
+        LOGGER.exception("Server startup error")
 
 if __name__ == '__main__':
+    configure_debug_environment()
     run_debug_server()
\ No newline at end of file
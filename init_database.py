@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
-"""Reset and initialize Martingale database schemas for the current asset_id model."""
+"""Reset and initialize Martingale database schemas for the current asset_id model.
+
+Flask, SQLAlchemy, the models and AssetManager are imported inside the
+functions that use them so ``--help`` and argument errors return without
+paying for the full application import graph.
+"""
+from __future__ import annotations
+
 import argparse
 import logging
 import os
 from pathlib import Path
-from typing import Optional
-
-from flask import Flask
-from sqlalchemy.exc import SQLAlchemyError
+from typing import TYPE_CHECKING, Optional
 
 from config import config as config_map
-from models import db, Asset, PriceData
-from asset_manager import AssetManager
+
+if TYPE_CHECKING:
+    from flask import Flask
 
 
 LOGGER = logging.getLogger("martingale.init_database")
@@ -24,11 +29,25 @@ LOGGER.setLevel(logging.INFO)
 PROJECT_ROOT = Path(__file__).resolve().parent
 
 
+def _upsert_insert(dialect_name: str):
+    """Return the dialect-specific INSERT construct supporting ON CONFLICT, if any."""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert
+    return None
+
+
 def build_app(env: str) -> Flask:
     """Create a lightweight Flask app configured for the requested environment."""
+    from flask import Flask
+    from models import db
+
     config_class = config_map.get(env, config_map['default'])
     flask_app = Flask("martingale_init")
-    flask_app.config.from_object(config_class)
+    flask_app.config.update(config_class.as_mapping())
     db.init_app(flask_app)
     return flask_app
 
@@ -52,15 +71,24 @@ def remove_sqlite_file(database_uri: str) -> Optional[Path]:
     return db_path
 
 
-def reset_schema(reset: bool, delete_sqlite: bool) -> None:
-    """Drop all tables and optionally delete the SQLite file."""
+def reset_schema(reset: bool, delete_sqlite: bool, reflect_legacy: bool = False) -> None:
+    """Drop all tables and optionally delete the SQLite file.
+
+    Only tables registered on the models metadata are dropped unless
+    ``reflect_legacy`` is set, which introspects the database first so stray
+    legacy tables are removed as well.
+    """
     if not reset:
         return
 
+    from sqlalchemy.exc import SQLAlchemyError
+    from models import db
+
     db.session.remove()
     database_uri = db.engine.url.render_as_string(hide_password=False)
     try:
-        db.reflect()
+        if reflect_legacy:
+            db.reflect()
         db.drop_all()
         LOGGER.info("Existing tables dropped")
     except SQLAlchemyError as exc:
@@ -72,54 +100,81 @@ def reset_schema(reset: bool, delete_sqlite: bool) -> None:
 
 
 def seed_price_data(app_config) -> int:
-    """Populate the PriceData table from the configured ASSETS mapping."""
+    """Upsert the PriceData table from the configured ASSETS mapping."""
+    from models import db, PriceData
+
     assets_config = app_config.get('ASSETS', {})
     if not assets_config:
         LOGGER.info("No ASSETS configuration found; skipping price data seeding")
         return 0
 
-    rows = PriceData.query.count()
-    if rows:
-        LOGGER.info("Clearing %d existing price data rows", rows)
+    default_price = app_config.get('INITIAL_ASSET_PRICE', 100.0)
+    rows = [
+        {
+            'symbol': symbol,
+            'current_price': settings.get('price', default_price),
+            'volatility': settings.get('volatility', 0.02),
+            'history': '[]',
+        }
+        for symbol, settings in assets_config.items()
+    ]
+
+    dialect_insert = _upsert_insert(db.engine.dialect.name)
+    if dialect_insert is None:
+        # No native upsert available; fall back to clearing and re-inserting
         PriceData.query.delete()
-
-    created = 0
-    for symbol, settings in assets_config.items():
-        price_data = PriceData(
-            symbol=symbol,
-            current_price=settings.get('price', app_config.get('INITIAL_ASSET_PRICE', 100.0)),
-            volatility=settings.get('volatility', 0.02),
-            history='[]'
+        db.session.execute(PriceData.__table__.insert(), rows)
+    else:
+        stmt = dialect_insert(PriceData).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['symbol'],
+            set_={
+                'current_price': stmt.excluded.current_price,
+                'volatility': stmt.excluded.volatility,
+                'history': stmt.excluded.history,
+            },
         )
-        db.session.add(price_data)
-        created += 1
+        db.session.execute(stmt)
 
+    created = len(rows)
     LOGGER.info("Seeded %d price data rows", created)
     return created
 
 
 def seed_asset_pool(app_config) -> int:
     """Ensure there are active assets in the database matching MIN_ACTIVE_ASSETS."""
+    from sqlalchemy import func
+    from asset_manager import AssetManager
+    from models import db, Asset
+
     target = app_config.get('MIN_ACTIVE_ASSETS', 16)
-    active_count = Asset.query.filter_by(is_active=True).count()
+    if target <= 0:
+        LOGGER.info("MIN_ACTIVE_ASSETS is %d; skipping asset pool seeding", target)
+        return 0
+
+    active_count = db.session.query(func.count(Asset.id)).filter(Asset.is_active.is_(True)).scalar()
     if active_count >= target:
         LOGGER.info("Asset pool already has %d active assets", active_count)
         return 0
 
     manager = AssetManager(app_config, price_service=None, socketio=None)
     created_assets = target - active_count
-    manager.create_new_assets(count=created_assets)
+    # Leave the commit to initialize_database so all seeding lands in one transaction
+    manager.create_new_assets(count=created_assets, commit=False)
     LOGGER.info("Created %d active assets", created_assets)
     return created_assets
 
 
-def initialize_database(env: str, reset: bool, seed_prices: bool, seed_assets: bool, delete_sqlite: bool) -> None:
+def initialize_database(env: str, reset: bool, seed_prices: bool, seed_assets: bool, delete_sqlite: bool,
+                        reflect_legacy: bool = False) -> None:
     """Perform the full initialization workflow for the selected environment."""
+    from models import db
+
     flask_app = build_app(env)
 
     with flask_app.app_context():
         LOGGER.info("Initializing database for %s environment", env)
-        reset_schema(reset=reset, delete_sqlite=delete_sqlite)
+        reset_schema(reset=reset, delete_sqlite=delete_sqlite, reflect_legacy=reflect_legacy)
 
         db.create_all()
         LOGGER.info("Database tables created")
@@ -130,6 +185,7 @@ def initialize_database(env: str, reset: bool, seed_prices: bool, seed_assets: b
         if seed_assets:
             seed_asset_pool(flask_app.config)
 
+        # Single commit for every seeding step above
         db.session.commit()
         LOGGER.info("Database initialization complete")
 
@@ -143,12 +199,16 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser.add_argument('--skip-asset-seed', action='store_true', help='Skip rebuilding the active asset pool')
     parser.add_argument('--keep-sqlite-file', action='store_true',
                         help='Keep existing SQLite file instead of deleting it on reset')
+    parser.add_argument('--reflect-legacy', action='store_true',
+                        help='Reflect the live schema before reset so tables unknown to the models are dropped too')
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     args = parse_args(argv)
 
+    from sqlalchemy.exc import SQLAlchemyError
+
     try:
         initialize_database(
             env=args.env,
@@ -156,6 +216,7 @@ def main(argv: Optional[list[str]] = None) -> int:
             seed_prices=not args.skip_price_seed,
             seed_assets=not args.skip_asset_seed,
             delete_sqlite=not args.keep_sqlite_file,
+            reflect_legacy=args.reflect_legacy,
         )
     except SQLAlchemyError as exc:
         LOGGER.error("Initialization failed: %s", exc)
@@ -8,6 +8,10 @@ For database initialization, use:
 
 This file is kept for reference but should not be used in production.
 """
+if __name__ != '__main__':
+    # Fail fast on accidental imports instead of loading config for a dead code path
+    raise ImportError("init_local_data is deprecated; use init_database")
+
 import json
 import os
 from config import config
@@ -0,0 +1,66 @@
+"""
+Fast JSON helpers for the text columns that store holdings, positions and history,
+and the Flask JSON provider used for API responses.
+
+orjson parses and serializes in native code; when it is not installed the
+stdlib json module is used so behaviour stays identical, only slower.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+    import json
+
+
+if orjson is not None:
+    def loads(data):
+        """Parse a JSON document from str or bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj, indent=False) -> str:
+        """Serialize ``obj`` to a JSON string (numpy scalars and int keys allowed).
+
+        Output is compact unless ``indent`` is set, which uses two-space indentation.
+        """
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode()
+else:
+    def loads(data):
+        """Parse a JSON document from str or bytes."""
+        return json.loads(data)
+
+    def dumps(obj, indent=False) -> str:
+        """Serialize ``obj`` to a JSON string (int keys become strings).
+
+        Output is compact unless ``indent`` is set, which uses two-space indentation.
+        """
+        if indent:
+            return json.dumps(obj, indent=2)
+        return json.dumps(obj, separators=(',', ':'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes responses with orjson when available.
+
+    Datetimes are passed through to Flask's default hook so responses keep the
+    same format as the stock provider; numpy values and int dict keys are allowed.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
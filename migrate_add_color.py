@@ -3,8 +3,10 @@
 Migration script to add color column to assets table.
 Run this once to update existing databases.
 """
+import logging
 import os
 import sys
+import numpy as np
 from sqlalchemy import text
 
 # Set up the app context
@@ -12,6 +14,9 @@ os.environ.setdefault('FLASK_ENV', 'development')
 
 from app import create_app
 from models import db, Asset
+from schema_version import COLOR_MIGRATION, mark_migration_applied, migration_applied
+
+LOGGER = logging.getLogger(__name__)
 
 def migrate_add_color():
     """Add color column to assets table and assign random colors to existing assets."""
@@ -19,6 +24,11 @@ def migrate_add_color():
     
     with app.app_context():
         try:
+            # Short-circuit repeat runs without inspecting table metadata
+            if migration_applied(db.session, COLOR_MIGRATION):
+                print("✓ Color migration already applied")
+                return
+            
             # Check if color column exists
             result = db.session.execute(text("PRAGMA table_info(assets)"))
             columns = [row[1] for row in result]
@@ -31,26 +41,34 @@ def migrate_add_color():
                 db.session.commit()
                 print("✓ Color column added")
             
-            # Update existing assets without colors
-            assets_without_color = Asset.query.filter(
+            # Update existing assets without colors (only ids are needed)
+            assets_without_color = db.session.query(Asset.id).filter(
                 (Asset.color == None) | (Asset.color == '')
             ).all()
             
             if assets_without_color:
                 print(f"Assigning colors to {len(assets_without_color)} existing assets...")
-                for asset in assets_without_color:
-                    asset.color = Asset.get_random_color()
+                # Draw every palette index in one numpy call instead of one random.choice per asset
+                palette = Asset.COLOR_PALETTE
+                picks = np.random.randint(0, len(palette), size=len(assets_without_color)).tolist()
+                mappings = [
+                    {'id': asset_id, 'color': palette[pick]}
+                    for (asset_id,), pick in zip(assets_without_color, picks)
+                ]
+                # One executemany UPDATE instead of a flush per dirty instance
+                db.session.bulk_update_mappings(Asset, mappings)
                 db.session.commit()
                 print(f"✓ Assigned colors to {len(assets_without_color)} assets")
             else:
                 print("✓ All assets already have colors assigned")
             
+            mark_migration_applied(db.session, COLOR_MIGRATION)
+            db.session.commit()
+            
             print("\n✓ Migration completed successfully!")
             
-        except Exception as e:
-            print(f"✗ Migration failed: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            LOGGER.exception("Color migration failed")
             db.session.rollback()
             sys.exit(1)
 
@@ -8,6 +8,7 @@ os.environ.setdefault('FLASK_ENV', 'development')
 
 from app import create_app
 from models import db, Asset
+from schema_version import DRIFT_MIGRATION, mark_migration_applied, migration_applied
 from sqlalchemy import inspect, text
 
 def check_column_exists(table_name, column_name):
@@ -25,9 +26,17 @@ def migrate_add_drift():
         print("MIGRATION: Add drift column to assets table")
         print("="*80)
         
+        # Short-circuit repeat runs without inspecting table metadata
+        if migration_applied(db.session, DRIFT_MIGRATION):
+            print("✓ Drift migration already applied - no migration needed")
+            print("="*80)
+            return True
+        
         # Check if drift column already exists
         if check_column_exists('assets', 'drift'):
             print("✓ Column 'drift' already exists in assets table - no migration needed")
+            mark_migration_applied(db.session, DRIFT_MIGRATION)
+            db.session.commit()
             print("="*80)
             return True
         
@@ -47,14 +56,17 @@ def migrate_add_drift():
             if check_column_exists('assets', 'drift'):
                 print("✓ Verified: 'drift' column now exists in assets table")
                 
-                # Check existing assets
-                existing_assets = Asset.query.all()
-                print(f"✓ Found {len(existing_assets)} existing assets")
+                # Check existing assets (drift only, so other pending migrations don't matter)
+                existing_drifts = [drift for (drift,) in db.session.query(Asset.drift)]
+                print(f"✓ Found {len(existing_drifts)} existing assets")
                 
-                if existing_assets:
+                if existing_drifts:
                     # Verify drift values
-                    zero_drift_count = sum(1 for a in existing_assets if a.drift == 0.0)
-                    print(f"✓ {zero_drift_count}/{len(existing_assets)} assets have drift=0.0 (backward compatible)")
+                    zero_drift_count = sum(1 for drift in existing_drifts if drift == 0.0)
+                    print(f"✓ {zero_drift_count}/{len(existing_drifts)} assets have drift=0.0 (backward compatible)")
+                
+                mark_migration_applied(db.session, DRIFT_MIGRATION)
+                db.session.commit()
                 
                 print("="*80)
                 print("✅ MIGRATION COMPLETED SUCCESSFULLY")
@@ -17,7 +17,7 @@ def migrate_password_hash_column():
     # Create Flask app with production config
     app = Flask(__name__)
     env = os.environ.get('FLASK_ENV', 'production')
-    app.config.from_object(config[env])
+    app.config.update(config[env].as_mapping())
     
     # Initialize database
     db.init_app(app)
@@ -5,18 +5,52 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 import numpy as np
-import json
+import json_utils
 import random
 import string
+import time
 
 db = SQLAlchemy()
 
+# Shared generator for batched asset parameter draws
+_rng = np.random.default_rng()
+
 
 def current_utc() -> datetime:
     """Return naive UTC timestamp derived from timezone-aware clock."""
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
+
+def utc_timestamp(value: datetime) -> float:
+    """Return UNIX seconds for a naive UTC datetime as stored in the database."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _raise_on_lazy_load(orm_execute_state):
+    """Reject SQL emitted by a lazy relationship load (eager selectin/joined loads pass)."""
+    if not orm_execute_state.is_select:
+        return  # ORM INSERT/UPDATE/DELETE carry no load options to inspect
+    state = orm_execute_state.lazy_loaded_from
+    if state is not None:
+        raise InvalidRequestError(
+            f"Lazy load from {state.class_.__name__} while RAISE_ON_LAZY_LOAD is enabled; "
+            "add selectinload()/joinedload() to the originating query"
+        )
+
+
+def enable_lazy_load_guard():
+    """Make every lazy relationship load on db.session raise instead of querying.
+
+    Opt-in strict mode for tests and debugging to surface N+1 patterns. Relationships
+    that are eager by declaration (User.portfolio, Transaction.asset, Settlement.asset)
+    are unaffected; everything else must be loaded explicitly by the query that needs it.
+    """
+    if not event.contains(db.session, 'do_orm_execute', _raise_on_lazy_load):
+        event.listen(db.session, 'do_orm_execute', _raise_on_lazy_load)
+
 class User(UserMixin, db.Model):
     """User model for authentication."""
     __tablename__ = 'users'
@@ -26,9 +60,11 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=current_utc)
     
-    # Relationship to portfolio
-    portfolio = db.relationship('Portfolio', backref='user', uselist=False, cascade='all, delete-orphan')
-    transactions = db.relationship('Transaction', backref='user', cascade='all, delete-orphan')
+    # Relationship to portfolio (selectin: nearly every request reads it, and user lists load it in one IN query)
+    portfolio = db.relationship('Portfolio', back_populates='user', uselist=False, cascade='all, delete-orphan',
+                                lazy='selectin')
+    transactions = db.relationship('Transaction', back_populates='user', cascade='all, delete-orphan')
+    settlements = db.relationship('Settlement', back_populates='user')
     
     def set_password(self, password):
         """Set password hash."""
@@ -52,6 +88,13 @@ class Portfolio(db.Model):
     position_info = db.Column(db.Text, default='{}')  # JSON string of position info
     updated_at = db.Column(db.DateTime, default=current_utc, onupdate=current_utc)
     
+    # Relationships
+    user = db.relationship('User', back_populates='portfolio')
+    
+    # Parsed (raw_text, normalized_map) pairs; reused while the column text is unchanged
+    _holdings_cache = None
+    _position_cache = None
+    
     # Database constraints for data integrity
     __table_args__ = (
         db.CheckConstraint('cash >= 0', name='check_cash_non_negative'),
@@ -59,93 +102,131 @@ class Portfolio(db.Model):
     )
     
     @staticmethod
-    def _normalize_asset_id(raw_key):
-        """Convert stored key (id or legacy symbol) into an asset id."""
-        if raw_key is None:
-            return None
-        if isinstance(raw_key, int):
-            return raw_key
-        if isinstance(raw_key, str):
-            stripped = raw_key.strip()
-            if stripped.isdigit():
-                return int(stripped)
-            # Legacy storage by symbol name
-            asset = Asset.query.filter_by(symbol=stripped).order_by(Asset.created_at.desc()).first()
-            return asset.id if asset else None
-        try:
-            return int(raw_key)
-        except (TypeError, ValueError):
-            return None
+    def _resolve_asset_ids(raw_keys):
+        """Map stored keys (ids or legacy symbols) to asset ids with at most one query.
+
+        Keys that cannot be resolved are left out of the returned dict.
+        """
+        resolved = {}
+        legacy = {}  # raw key -> stripped symbol
+        for raw_key in raw_keys:
+            if raw_key is None:
+                continue
+            if isinstance(raw_key, int):
+                resolved[raw_key] = raw_key
+                continue
+            try:
+                # Stringified ids are the common case; int() tolerates surrounding whitespace
+                resolved[raw_key] = int(raw_key)
+            except (TypeError, ValueError):
+                if isinstance(raw_key, str):
+                    legacy[raw_key] = raw_key.strip()
+        if legacy:
+            # Legacy storage by symbol name; newest asset wins for reused symbols
+            missing = {symbol for symbol in legacy.values() if symbol not in _symbol_ids}
+            if missing:
+                rows = db.session.query(Asset.symbol, Asset.id).filter(
+                    Asset.symbol.in_(missing)
+                ).order_by(Asset.created_at.desc())
+                for symbol, asset_id in rows:
+                    _symbol_ids.setdefault(symbol, asset_id)
+            for raw_key, symbol in legacy.items():
+                if symbol in _symbol_ids:
+                    resolved[raw_key] = _symbol_ids[symbol]
+        return resolved
 
     @staticmethod
-    def _serialize_holdings(holdings_map):
-        if not holdings_map:
-            return '{}'
-        normalized = {str(int(asset_id)): float(quantity) for asset_id, quantity in holdings_map.items() if asset_id is not None}
-        return json.dumps(normalized)
+    def _normalize_holdings(holdings_map):
+        return {int(asset_id): float(quantity) for asset_id, quantity in holdings_map.items() if asset_id is not None}
 
     @staticmethod
-    def _serialize_position_info(position_map):
-        if not position_map:
-            return '{}'
-        normalized = {}
-        for asset_id, info in position_map.items():
-            if asset_id is None:
-                continue
-            normalized[str(int(asset_id))] = {
+    def _normalize_position_info(position_map):
+        return {
+            int(asset_id): {
                 'total_cost': float(info.get('total_cost', 0.0)),
                 'total_quantity': float(info.get('total_quantity', 0.0))
             }
-        return json.dumps(normalized)
+            for asset_id, info in position_map.items() if asset_id is not None
+        }
 
     def get_holdings_map(self):
-        """Return holdings keyed by asset id (int -> float)."""
-        raw = json.loads(self.holdings) if self.holdings else {}
+        """Return holdings keyed by asset id (int -> float).
+
+        The parsed map is cached against the column text; callers get a copy they may mutate.
+        """
+        text = self.holdings
+        if not text or text == '{}':
+            return {}  # Empty default; skip the parse
+        cache = self._holdings_cache
+        if cache is not None and cache[0] == text:
+            return dict(cache[1])
+        raw = json_utils.loads(text)
+        asset_ids = self._resolve_asset_ids(raw)
         normalized = {}
         for raw_key, quantity in raw.items():
-            asset_id = self._normalize_asset_id(raw_key)
+            asset_id = asset_ids.get(raw_key)
             if asset_id is not None:
                 normalized[asset_id] = float(quantity)
-        return normalized
+        self._holdings_cache = (text, normalized)
+        return dict(normalized)
 
     def set_holdings(self, holdings_map):
         """Persist holdings keyed by asset id."""
-        self.holdings = self._serialize_holdings(holdings_map)
+        if not holdings_map:
+            self.holdings = '{}'
+            return
+        # One normalization pass feeds both the stored text (int keys dump as strings) and the cache
+        normalized = self._normalize_holdings(holdings_map)
+        text = json_utils.dumps(normalized)
+        self.holdings = text
+        self._holdings_cache = (text, normalized)
 
     def get_holdings_by_symbol(self):
         """Return holdings keyed by asset symbol for presentation purposes."""
         holdings = self.get_holdings_map()
         if not holdings:
             return {}
-        assets = Asset.query.filter(Asset.id.in_(holdings.keys())).all()
-        id_to_symbol = {asset.id: asset.symbol for asset in assets if asset.symbol}
+        id_to_symbol = asset_symbols(holdings.keys())
         return {id_to_symbol[asset_id]: holdings[asset_id] for asset_id in holdings if asset_id in id_to_symbol}
 
     def get_position_info_map(self):
-        """Return position metadata keyed by asset id."""
-        raw = json.loads(self.position_info) if self.position_info else {}
+        """Return position metadata keyed by asset id (cached like get_holdings_map)."""
+        text = self.position_info
+        if not text or text == '{}':
+            return {}  # Empty default; skip the parse
+        cache = self._position_cache
+        if cache is not None and cache[0] == text:
+            return {asset_id: dict(info) for asset_id, info in cache[1].items()}
+        raw = json_utils.loads(text)
+        asset_ids = self._resolve_asset_ids(raw)
         normalized = {}
         for raw_key, info in raw.items():
-            asset_id = self._normalize_asset_id(raw_key)
+            asset_id = asset_ids.get(raw_key)
             if asset_id is None:
                 continue
             normalized[asset_id] = {
                 'total_cost': float(info.get('total_cost', 0.0)) if info else 0.0,
                 'total_quantity': float(info.get('total_quantity', 0.0)) if info else 0.0
             }
-        return normalized
+        self._position_cache = (text, normalized)
+        return {asset_id: dict(info) for asset_id, info in normalized.items()}
 
     def set_position_info(self, position_map):
         """Persist position info keyed by asset id."""
-        self.position_info = self._serialize_position_info(position_map)
+        if not position_map:
+            self.position_info = '{}'
+            return
+        normalized = self._normalize_position_info(position_map)
+        text = json_utils.dumps(normalized)
+        self.position_info = text
+        self._position_cache = (text, normalized)
 
     def get_position_info_by_symbol(self):
         """Return position info keyed by asset symbol for presentation."""
         position_map = self.get_position_info_map()
         if not position_map:
             return {}
-        assets = Asset.query.filter(Asset.id.in_(position_map.keys())).all()
-        id_to_symbol = {asset.id: asset.symbol for asset in assets if asset.symbol}
+        id_to_symbol = asset_symbols(position_map.keys())
         result = {}
         for asset_id, info in position_map.items():
             symbol = id_to_symbol.get(asset_id)
@@ -176,7 +257,8 @@ class Transaction(db.Model):
     created_at = db.Column(db.DateTime, default=current_utc)
 
     # Relationships
-    asset = db.relationship('Asset', back_populates='transactions', lazy='joined')
+    user = db.relationship('User', back_populates='transactions')
+    asset = db.relationship('Asset', back_populates='transactions', lazy='selectin')
     
     # Database constraints for data integrity
     __table_args__ = (
@@ -184,6 +266,8 @@ class Transaction(db.Model):
         db.CheckConstraint('price >= 0', name='check_non_negative_price'),
         db.CheckConstraint('total_cost >= 0', name='check_non_negative_cost'),
         db.CheckConstraint("type IN ('buy', 'sell', 'settlement')", name='check_valid_type'),
+        # Serves per-user history pages (user_id = ? ORDER BY timestamp DESC LIMIT n) as a reverse range scan
+        db.Index('ix_tx_user_time', 'user_id', 'timestamp'),
     )
 
     @property
@@ -201,28 +285,8 @@ class PriceData(db.Model):
     symbol = db.Column(db.String(10), nullable=False, unique=True)
     current_price = db.Column(db.Float, nullable=False)
     volatility = db.Column(db.Float, default=0.02)
-    history = db.Column(db.Text, default='[]')  # JSON string of price history
+    history = db.Column(db.Text, default='[]')  # Legacy JSON history; live history is kept by price_service
     updated_at = db.Column(db.DateTime, default=current_utc, onupdate=current_utc)
-    
-    def get_history(self):
-        """Get price history as list."""
-        return json.loads(self.history) if self.history else []
-    
-    def set_history(self, history_list):
-        """Set price history from list."""
-        self.history = json.dumps(history_list)
-    
-    def add_price_point(self, timestamp, price):
-        """Add a new price point to history."""
-        history = self.get_history()
-        history.append({'time': timestamp, 'price': price})
-        
-        # Keep only last 1000 points to prevent database bloat
-        if len(history) > 1000:
-            history = history[-1000:]
-        
-        self.set_history(history)
-        self.current_price = price
 
 
 class Asset(db.Model):
@@ -239,7 +303,8 @@ class Asset(db.Model):
     color = db.Column(db.String(7), nullable=False)  # Hex color code
     created_at = db.Column(db.DateTime, default=current_utc, nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False, index=True)
-    is_active = db.Column(db.Boolean, default=True, nullable=False, index=True)
+    expires_at_ts = db.Column(db.Float, nullable=True)  # expires_at as UNIX seconds, kept in sync by a listener
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
     final_price = db.Column(db.Float, nullable=True)  # Set when asset expires
     settled_at = db.Column(db.DateTime, nullable=True)  # When settlement occurred
     
@@ -254,6 +319,9 @@ class Asset(db.Model):
         db.CheckConstraint('volatility >= 0', name='check_non_negative_volatility'),
         db.CheckConstraint('volatility <= 1', name='check_volatility_max'),
         db.CheckConstraint('final_price IS NULL OR final_price >= 0', name='check_non_negative_final_price'),
+        # Matches the expiry sweep predicate (is_active, expires_at <= now) in column order;
+        # its leading column also serves the plain is_active lookups
+        db.Index('ix_asset_active_expiry', 'is_active', 'expires_at'),
     )
     
     # Color palette for random assignment
@@ -264,11 +332,45 @@ class Asset(db.Model):
         '#ff9f40', '#9966ff', '#c9cbcf', '#00d084', '#fe6b8b'
     ]
     
+    # generate_symbol misses tolerated before trying one letter longer, and the cap
+    SYMBOL_ATTEMPTS_PER_LENGTH = 1000
+    SYMBOL_MAX_LENGTH = 8
+    
+    # Joint prior for (drift, log volatility) of new assets
+    PARAM_MEAN = [-0.001, np.log(0.05)]
+    PARAM_COV = np.array([
+        [0.001**2, 0.0],
+        [0.0, 0.5**2]
+    ])
+    # Lognormal initial price with mean INITIAL_PRICE_MEAN
+    INITIAL_PRICE_MEAN = 100.0
+    INITIAL_PRICE_SIGMA = 1.0  # Reasonable spread
+    # Normal time to expiry in minutes, clipped to [min, max]
+    EXPIRY_MINUTES_MU = 10
+    EXPIRY_MINUTES_SIGMA = 2
+    EXPIRY_MINUTES_MIN = 5
+    EXPIRY_MINUTES_MAX = 15
+    
     @staticmethod
     def get_random_color():
         """Get a random color from the palette."""
         return random.choice(Asset.COLOR_PALETTE)
     
+    @staticmethod
+    def pick_colors(count, active_colors=()):
+        """Pick ``count`` palette colors in one numpy draw, preferring colors not in ``active_colors``.
+
+        Unused colors are handed out without repeats; once they run out the rest
+        are drawn from the full palette, matching create_new_asset's fallback.
+        """
+        palette = Asset.COLOR_PALETTE
+        available = [c for c in palette if c not in active_colors]
+        colors = [available[i] for i in _rng.permutation(len(available))[:count].tolist()]
+        if len(colors) < count:
+            extra = _rng.integers(0, len(palette), size=count - len(colors)).tolist()
+            colors.extend(palette[i] for i in extra)
+        return colors
+    
     # @staticmethod
     # def generate_symbol(length=3, include_day_of_month=False):
     #     """Generate a random symbol using uppercase letters."""
@@ -285,41 +387,50 @@ class Asset(db.Model):
     #             raise ValueError("Failed to generate a unique symbol after 1000 attempts")
             
     @staticmethod
-    def generate_symbol(length=3, include_day_of_month=False, exclude_symbols=None):
+    def recent_symbols():
+        """Return the set of symbols that are active or were active in the last 24 hours."""
+        recent_cutoff = current_utc() - timedelta(hours=24)
+        return {
+            row[0] for row in db.session.query(Asset.symbol).filter(
+                (Asset.is_active == True) | (Asset.expires_at >= recent_cutoff)
+            )
+        }
+
+    @staticmethod
+    def generate_symbol(length=3, include_day_of_month=False, exclude_symbols=None, taken_symbols=None):
         """Generate a random symbol using uppercase letters, avoiding recent/active symbols and explicit exclusions.
         Args:
             length: Length of the symbol (default 3)
             include_day_of_month: If True, append minute to symbol
             exclude_symbols: Optional set/list of symbols to explicitly exclude
+            taken_symbols: Optional preloaded recent_symbols() set; loaded with one query if omitted
         """
+        if taken_symbols is None:
+            taken_symbols = Asset.recent_symbols()
+        exclude = exclude_symbols or ()
         _n_cycles = 0
-        from datetime import timedelta
-        recent_cutoff = current_utc() - timedelta(hours=24)
-        exclude_set = set(exclude_symbols) if exclude_symbols else set()
         while True:
             symbol = ''.join(random.choices(string.ascii_uppercase, k=length))
             if include_day_of_month:
                 symbol += str(current_utc().minute)
-            if symbol in exclude_set:
-                _n_cycles += 1
-                if _n_cycles > 100000:
-                    raise ValueError("Failed to generate a unique symbol after 10000 attempts")
-                continue
-            # Check if symbol is active or was active in the last 24 hours
-            recent_or_active = Asset.query.filter(
-                Asset.symbol == symbol,
-                ((Asset.is_active == True) | (Asset.expires_at >= recent_cutoff))
-            ).first()
-            if not recent_or_active:
+            if symbol not in taken_symbols and symbol not in exclude:
                 return symbol
             _n_cycles += 1
+            # Symbol space at this length looks saturated; widen it rather than spin
+            if _n_cycles % Asset.SYMBOL_ATTEMPTS_PER_LENGTH == 0 and length < Asset.SYMBOL_MAX_LENGTH:
+                length += 1
             if _n_cycles > 100000:
-                raise ValueError("Failed to generate a unique symbol after 10000 attempts")
+                raise ValueError("Failed to generate a unique symbol after 100000 attempts")
 
     @staticmethod
-    def create_new_asset(initial_price=None, volatility=None, drift=None, minutes_to_expiry=None, **kwargs):
+    def create_new_asset(initial_price=None, volatility=None, drift=None, minutes_to_expiry=None,
+                         active_colors=None, color=None, **kwargs):
         """Create a new asset with random expiration.
         Chooses a color not used by any currently active asset.
+
+        Batch callers may pass a pre-picked ``color`` (see pick_colors), or
+        ``active_colors`` (a set they own) to skip the per-asset colour query;
+        a colour chosen here is added to that set in place.
         """
         symbol = Asset.generate_symbol(**kwargs)
 
@@ -328,28 +439,19 @@ class Asset(db.Model):
         elif volatility is None and drift is not None:
             volatility = np.random.lognormal(mean=np.log(0.05), sigma=0.5)
         elif drift is None and volatility is None:
-            mu_0 = -0.001
-            log_sigma_0 = np.log(0.05)
-            cov = np.array([
-                [0.001**2, 0.0],
-                [0.0, 0.5**2]
-            ])
-            drift, log_sigma = np.random.multivariate_normal([mu_0, log_sigma_0], cov)
+            drift, log_sigma = np.random.multivariate_normal(Asset.PARAM_MEAN, Asset.PARAM_COV)
             volatility = np.exp(log_sigma)
 
         # Random initial price if not specified
         if initial_price is None:
-            mean_init = 100.0
-            sigma_logn = 1.0  # Reasonable spread
-            mu_logn = np.log(mean_init) - (sigma_logn**2) / 2
+            sigma_logn = Asset.INITIAL_PRICE_SIGMA
+            mu_logn = np.log(Asset.INITIAL_PRICE_MEAN) - (sigma_logn**2) / 2
             initial_price = np.random.lognormal(mean=mu_logn, sigma=sigma_logn)
 
         # Using exponential distribution for average around 30 minutes
         if minutes_to_expiry is None:
-            mu = 10
-            sigma = 2
-            minutes_to_expiry = random.normalvariate(mu, sigma)
-            minutes_to_expiry = max(5, min(15, minutes_to_expiry))
+            minutes_to_expiry = random.normalvariate(Asset.EXPIRY_MINUTES_MU, Asset.EXPIRY_MINUTES_SIGMA)
+            minutes_to_expiry = max(Asset.EXPIRY_MINUTES_MIN, min(Asset.EXPIRY_MINUTES_MAX, minutes_to_expiry))
 
         expires_at = current_utc() + timedelta(minutes=minutes_to_expiry)
 
@@ -357,14 +459,17 @@ class Asset(db.Model):
         # active_colors = set(
         #     c[0] for c in db.session.query(Asset.color).filter(Asset.is_active).all()
         # )
-        active_colors = set(
-            asset.color for asset in Asset.query.filter(Asset.is_active).all()
-        )
-        available_colors = [c for c in Asset.COLOR_PALETTE if c not in active_colors]
-        if available_colors:
-            color = random.choice(available_colors)
-        else:
-            color = Asset.get_random_color()  # fallback: allow reuse if all are taken
+        if color is None:
+            if active_colors is None:
+                active_colors = set(
+                    asset.color for asset in Asset.query.filter(Asset.is_active).all()
+                )
+            available_colors = [c for c in Asset.COLOR_PALETTE if c not in active_colors]
+            if available_colors:
+                color = random.choice(available_colors)
+            else:
+                color = Asset.get_random_color()  # fallback: allow reuse if all are taken
+            active_colors.add(color)
 
         asset = Asset(
             symbol=symbol,
@@ -377,18 +482,77 @@ class Asset(db.Model):
             is_active=True
         )
         return asset
+
+    @staticmethod
+    def create_batch(count, initial_price=None, active_colors=(), exclude_symbols=None):
+        """Create ``count`` new assets, drawing all random parameters in one numpy call each.
+
+        Uses the same distributions as create_new_asset. Symbols are unique within the
+        batch; ``exclude_symbols`` (a set the caller owns) is extended with them.
+        """
+        if count <= 0:
+            return []
+        params = _rng.multivariate_normal(Asset.PARAM_MEAN, Asset.PARAM_COV, size=count)
+        drifts = params[:, 0].tolist()
+        volatilities = np.exp(params[:, 1]).tolist()
+        if initial_price is None:
+            sigma_logn = Asset.INITIAL_PRICE_SIGMA
+            mu_logn = np.log(Asset.INITIAL_PRICE_MEAN) - (sigma_logn**2) / 2
+            prices = _rng.lognormal(mean=mu_logn, sigma=sigma_logn, size=count).tolist()
+        else:
+            prices = [initial_price] * count
+        minutes = np.clip(
+            _rng.normal(Asset.EXPIRY_MINUTES_MU, Asset.EXPIRY_MINUTES_SIGMA, size=count),
+            Asset.EXPIRY_MINUTES_MIN, Asset.EXPIRY_MINUTES_MAX
+        ).tolist()
+        colors = Asset.pick_colors(count, active_colors)
+        exclude_symbols = set() if exclude_symbols is None else exclude_symbols
+        taken_symbols = Asset.recent_symbols()
+
+        now = current_utc()
+        assets = []
+        for drift, volatility, price, minutes_to_expiry, color in zip(drifts, volatilities, prices, minutes, colors):
+            symbol = Asset.generate_symbol(exclude_symbols=exclude_symbols, taken_symbols=taken_symbols)
+            exclude_symbols.add(symbol)
+            assets.append(Asset(
+                symbol=symbol,
+                initial_price=price,
+                current_price=price,
+                volatility=volatility,
+                drift=drift,
+                color=color,
+                expires_at=now + timedelta(minutes=minutes_to_expiry),
+                is_active=True
+            ))
+        return assets
     
-    def expire(self, final_price=None):
+    def expire(self, final_price=None, now=None):
         """Mark asset as expired and set final price.
         
         Args:
             final_price: Final settlement price (uses current_price if None)
+            now: Settlement time (naive UTC datetime); pass one value for a whole sweep
         """
         self.is_active = False
         self.final_price = final_price if final_price is not None else self.current_price
-        self.settled_at = current_utc()
+        self.settled_at = now if now is not None else current_utc()
+    
+    def _expiry_epoch(self):
+        """Expiry as UNIX seconds, falling back to expires_at for rows not yet backfilled."""
+        if self.expires_at_ts is not None:
+            return self.expires_at_ts
+        return utc_timestamp(self.expires_at)
     
-    def time_to_expiry(self):
+    def seconds_to_expiry(self, now_ts=None):
+        """Seconds remaining until expiration (0.0 once expired or inactive).
+
+        ``now_ts`` is UNIX seconds; callers looping over many assets pass one snapshot.
+        """
+        if not self.is_active:
+            return 0.0
+        return max(0.0, self._expiry_epoch() - (time.time() if now_ts is None else now_ts))
+    
+    def time_to_expiry(self, now_ts=None):
         """Get time remaining until expiration.
         
         Returns:
@@ -396,29 +560,33 @@ class Asset(db.Model):
         """
         if not self.is_active:
             return None
-        
-        now = current_utc()
-        if now >= self.expires_at:
-            return timedelta(0)
-        
-        return self.expires_at - now
+        return timedelta(seconds=self.seconds_to_expiry(now_ts))
+    
+    def is_expired(self, now_ts=None):
+        """Check if asset has expired (``now_ts`` is UNIX seconds, defaulting to the current time)."""
+        return (time.time() if now_ts is None else now_ts) >= self._expiry_epoch()
     
-    def is_expired(self):
-        """Check if asset has expired."""
-        return current_utc() >= self.expires_at
+    def iso_times(self):
+        """Return ``(created_at, expires_at)`` as ISO strings, memoized per asset id."""
+        cached = _asset_iso_times.get(self.id) if self.id is not None else None
+        if cached is None:
+            cached = (self.created_at.isoformat(), self.expires_at.isoformat())
+            if self.id is not None:
+                _asset_iso_times[self.id] = cached
+        return cached
     
-    def to_dict(self):
-        """Convert asset to dictionary for API responses."""
-        ttl = self.time_to_expiry()
+    def to_dict(self, now_ts=None):
+        """Convert asset to dictionary for API responses (``now_ts`` is UNIX seconds)."""
+        created_iso, expires_iso = self.iso_times()
         return {
             'symbol': self.symbol,
             'price': self.current_price,
             'initial_price': self.initial_price,
             'volatility': self.volatility,
             'drift': self.drift,
-            'created_at': self.created_at.isoformat(),
-            'expires_at': self.expires_at.isoformat(),
-            'time_to_expiry_seconds': ttl.total_seconds() if ttl else 0,
+            'created_at': created_iso,
+            'expires_at': expires_iso,
+            'time_to_expiry_seconds': self.seconds_to_expiry(now_ts),
             'is_active': self.is_active,
             'final_price': self.final_price,
             'settled_at': self.settled_at.isoformat() if self.settled_at else None
@@ -428,6 +596,75 @@ class Asset(db.Model):
         return f'<Asset {self.symbol} expires {self.expires_at}>'
 
 
+# Asset id -> symbol. A symbol never changes once its asset row exists, so display
+# paths can skip the Asset query; the listeners below drop entries that go away.
+_asset_symbols = {}
+# Symbol -> id of the newest asset using it, for resolving legacy symbol-keyed holdings
+_symbol_ids = {}
+# Asset id -> (created_at, expires_at) ISO strings; both are fixed once the row is written
+_asset_iso_times = {}
+
+
+def asset_symbols(asset_ids):
+    """Return {asset_id: symbol} for ``asset_ids``, querying only ids not seen before."""
+    missing = [asset_id for asset_id in asset_ids if asset_id not in _asset_symbols]
+    if missing:
+        rows = db.session.query(Asset.id, Asset.symbol).filter(Asset.id.in_(missing))
+        _asset_symbols.update((asset_id, symbol) for asset_id, symbol in rows if symbol)
+    return {asset_id: _asset_symbols[asset_id] for asset_id in asset_ids if asset_id in _asset_symbols}
+
+
+def _forget_symbol_id(asset_id):
+    for symbol in [s for s, cached_id in _symbol_ids.items() if cached_id == asset_id]:
+        del _symbol_ids[symbol]
+
+
+@event.listens_for(Asset, 'after_insert')
+def _cache_new_symbol(mapper, connection, target):
+    # A newly inserted asset is the newest holder of its symbol
+    _symbol_ids[target.symbol] = target.id
+
+
+@event.listens_for(Asset, 'after_update')
+def _refresh_cached_symbol(mapper, connection, target):
+    if target.id in _asset_symbols:
+        _asset_symbols[target.id] = target.symbol
+    _asset_iso_times.pop(target.id, None)
+    if _symbol_ids.get(target.symbol) != target.id:
+        _forget_symbol_id(target.id)
+
+
+@event.listens_for(Asset, 'after_delete')
+def _forget_cached_symbol(mapper, connection, target):
+    _asset_symbols.pop(target.id, None)
+    _asset_iso_times.pop(target.id, None)
+    _forget_symbol_id(target.id)
+
+
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def _reset_symbol_cache(target, connection, **kw):
+    # Fresh schema: ids may be reused for different assets
+    _asset_symbols.clear()
+    _symbol_ids.clear()
+    _asset_iso_times.clear()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_symbol_cache_on_rollback(session):
+    # Flush-time hooks may have cached rows that were never committed
+    _asset_symbols.clear()
+    _symbol_ids.clear()
+    _asset_iso_times.clear()
+
+
+@event.listens_for(Asset.expires_at, 'set')
+def _sync_expires_at_ts(target, value, oldvalue, initiator):
+    """Keep the epoch copy of expires_at current whenever expires_at is assigned."""
+    target.expires_at_ts = utc_timestamp(value) if value is not None else None
+    _asset_iso_times.pop(target.id, None)
+
+
 class Settlement(db.Model):
     """Settlement records for expired asset positions."""
     __tablename__ = 'settlements'
@@ -439,11 +676,12 @@ class Settlement(db.Model):
     quantity = db.Column(db.Float, nullable=False)
     settlement_price = db.Column(db.Float, nullable=False)
     settlement_value = db.Column(db.Float, nullable=False)  # quantity * settlement_price
+    color = db.Column(db.String(7), nullable=True)  # Copied from the asset so history reads need no join
     settled_at = db.Column(db.DateTime, default=current_utc, nullable=False)
     
     # Relationship
-    user = db.relationship('User', backref='settlements')
-    asset = db.relationship('Asset', back_populates='settlements', lazy='joined')
+    user = db.relationship('User', back_populates='settlements')
+    asset = db.relationship('Asset', back_populates='settlements', lazy='selectin')
     
     # Database constraints for data integrity
     __table_args__ = (
@@ -454,9 +692,11 @@ class Settlement(db.Model):
     
     @property
     def symbol(self):
-        """Convenience accessor for asset symbol."""
+        """Convenience accessor for asset symbol, preferring the stored copy to avoid loading the asset."""
+        if self.legacy_symbol:
+            return self.legacy_symbol
         return self.asset.symbol if self.asset else None
     
     def __repr__(self):
-        display_symbol = self.symbol or self.legacy_symbol
+        display_symbol = self.symbol
         return f'<Settlement {display_symbol} user={self.user_id} qty={self.quantity} value={self.settlement_value}>'
@@ -3,7 +3,11 @@ Price Client - Client library for communicating with the price service.
 Provides fallback functionality when the price service is unavailable.
 """
 import time
+from collections import OrderedDict, deque
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 from typing import Dict, List, Optional, Any, Union
 import logging
 
@@ -22,6 +26,16 @@ class PriceServiceClient:
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self._session = requests.Session()
+        # Reuse keep-alive connections across polls and retry brief upstream hiccups with backoff
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            # Refused connections fail at once so an outage goes straight to the fallback;
+            # only transient gateway errors and dropped reads are retried
+            max_retries=Retry(total=2, connect=0, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
     
     def _make_request(self, endpoint: str, method: str = 'GET', **kwargs) -> Optional[Dict]:
         """Make a request to the price service.
@@ -147,6 +161,8 @@ class PriceServiceClient:
 class FallbackPriceService:
     """Fallback price service that generates prices locally if the API is unavailable."""
     
+    MAX_HISTORY_POINTS = 100
+    
     def __init__(self, assets_config: Optional[Union[Dict[str, Dict[str, Any]], None]] = None):
         """Initialize with asset configuration.
         
@@ -160,7 +176,7 @@ class FallbackPriceService:
                     'price': config['price'],
                     'volatility': config.get('volatility', 0.02),
                     'drift': config.get('drift', 0.0),  # Default to 0.0 for backward compatibility
-                    'history': [],
+                    'history': deque(maxlen=self.MAX_HISTORY_POINTS),
                     'last_update': None
                 }
     
@@ -178,7 +194,7 @@ class FallbackPriceService:
                 'price': initial_price,
                 'volatility': volatility,
                 'drift': drift,
-                'history': [],
+                'history': deque(maxlen=self.MAX_HISTORY_POINTS),
                 'last_update': None
             }
             logger.info(f"Added asset {symbol} to fallback price service")
@@ -203,53 +219,52 @@ class FallbackPriceService:
     
     def update_prices(self):
         """Update prices using geometric Brownian motion with drift."""
-        import numpy as np
+        # Millisecond timestamp truncated to the second to avoid sub-second duplicates
+        timestamp = time.time_ns() // 1_000_000_000 * 1000
         
-        timestamp = time.time() * 1000
-        # Round timestamp to nearest second to avoid sub-second duplicates
-        timestamp = int(timestamp / 1000) * 1000
+        # Skip symbols that already have a price for this timestamp (last_update is the newest point)
+        due = [
+            data for data in self.assets.values() if data.get('last_update') != timestamp
+        ]
+        if not due:
+            return
         
-        for symbol, data in self.assets.items():
-            # Skip if this timestamp already exists for this symbol
-            if (data.get('last_update') == timestamp or
-                (len(data['history']) > 0 and data['history'][-1]['time'] == timestamp)):
-                continue
-            
-            # Use geometric Brownian motion with drift
-            # S(t+dt) = S(t) * exp((mu - 0.5*sigma^2)*dt + sigma*sqrt(dt)*Z)
-            # where:
-            #   mu = drift (mean return rate)
-            #   sigma = volatility
-            #   Z ~ N(0,1)
-            
-            dt = 1.0  # 1 second time step
-            sigma = data['volatility']
-            mu = data.get('drift', 0.0)  # Default to 0.0 for backward compatibility
-            
-            # Ensure |drift| <= sigma to prevent explosive price movements
-            mu = max(-sigma, min(sigma, mu))
-            
-            # Generate random shock from standard normal
-            z = np.random.standard_normal()
-            
-            # Calculate log-return with drift
-            # The -0.5*sigma^2*dt term is the Itô correction
-            log_return = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z
-            
-            # Update price using exponential (geometric Brownian motion)
-            data['price'] *= np.exp(log_return)
-            
-            # Ensure price stays positive (shouldn't go negative with GBM, but safety check)
-            data['price'] = max(data['price'], 0.0)
+        # Use geometric Brownian motion with drift, one vectorized step for every asset
+        # S(t+dt) = S(t) * exp((mu - 0.5*sigma^2)*dt + sigma*sqrt(dt)*Z)
+        # where:
+        #   mu = drift (mean return rate)
+        #   sigma = volatility
+        #   Z ~ N(0,1)
+        
+        dt = 1.0  # 1 second time step
+        n = len(due)
+        sigma = np.fromiter((data['volatility'] for data in due), dtype=np.float64, count=n)
+        mu = np.fromiter((data.get('drift', 0.0) for data in due), dtype=np.float64, count=n)
+        prices = np.fromiter((data['price'] for data in due), dtype=np.float64, count=n)
+        
+        # Ensure |drift| <= sigma to prevent explosive price movements
+        mu = np.clip(mu, -sigma, sigma)
+        
+        # Generate random shocks from standard normal
+        z = np.random.standard_normal(n)
+        
+        # Calculate log-returns with drift
+        # The -0.5*sigma^2*dt term is the Itô correction
+        log_return = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z
+        
+        # Update prices using exponential (geometric Brownian motion)
+        # Ensure prices stay positive (shouldn't go negative with GBM, but safety check)
+        new_prices = np.maximum(prices * np.exp(log_return), 0.0).tolist()
+        
+        for data, price in zip(due, new_prices):
+            data['price'] = price
             data['last_update'] = timestamp
             
-            # Add to history
-            price_record = {'time': timestamp, 'price': data['price']}
-            data['history'].append(price_record)
-            
-            # Keep only last 100 points
-            if len(data['history']) > 100:
-                data['history'].pop(0)
+            # Add to history; the bounded deque drops the oldest point itself
+            history = data['history']
+            if not isinstance(history, deque):  # Reset externally to a plain list
+                history = data['history'] = deque(history, maxlen=self.MAX_HISTORY_POINTS)
+            history.append({'time': timestamp, 'price': price})
     
     def get_current_prices(self) -> Dict[str, Dict[str, Any]]:
         """Get current prices for all assets."""
@@ -260,7 +275,7 @@ class FallbackPriceService:
         """Get price history for assets."""
         if symbol:
             if symbol in self.assets:
-                history = self.assets[symbol]['history']
+                history = list(self.assets[symbol]['history'])
                 if limit:
                     history = history[-limit:]
                 return {symbol: history}
@@ -268,7 +283,7 @@ class FallbackPriceService:
         else:
             result = {}
             for sym, data in self.assets.items():
-                history = data['history']
+                history = list(data['history'])
                 if limit:
                     history = history[-limit:]
                 result[sym] = history
@@ -288,8 +303,14 @@ class HybridPriceService:
         self.client: Optional[PriceServiceClient] = PriceServiceClient(api_url) if api_url else None
         self._api_enabled = bool(self.client)
         self._api_available = False
-        self._last_health_check = 0
+        self._last_health_check = float('-inf')  # monotonic seconds; forces a check on first use
         self._health_check_interval = 30  # seconds
+        # API responses are reused for a moment; the service only produces new prices once per second
+        self._cache_ttl = 0.5  # seconds
+        self._prices_cache = None
+        self._prices_cache_ts = 0.0
+        self._history_cache = OrderedDict()  # (symbol, limit) -> (fetched_at, history)
+        self._history_cache_size = 64
     
     def _check_api_health(self) -> bool:
         """Check if API is available (with caching to avoid frequent checks)."""
@@ -297,7 +318,7 @@ class HybridPriceService:
             self._api_available = False
             return False
 
-        current_time = time.time()
+        current_time = time.monotonic()
         if current_time - self._last_health_check > self._health_check_interval:
             self._api_available = self.client.health_check()
             self._last_health_check = current_time
@@ -306,12 +327,16 @@ class HybridPriceService:
     def get_current_prices(self) -> Dict[str, Dict[str, Any]]:
         """Get current prices, preferring API over fallback."""
         if self._check_api_health() and self.client:
+            now = time.monotonic()
+            if self._prices_cache is not None and now - self._prices_cache_ts < self._cache_ttl:
+                return self._prices_cache
             prices = self.client.get_current_prices()
             if prices:
+                self._prices_cache, self._prices_cache_ts = prices, now
                 return prices
         
         # Fallback to local generation - only update if prices are stale
-        current_time = time.time() * 1000
+        current_time = time.time_ns() // 1_000_000
         
         # Check if any price needs updating (older than 2 seconds)
         needs_update = False
@@ -328,8 +353,18 @@ class HybridPriceService:
     def get_price_history(self, symbol: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, List[Dict]]:
         """Get price history, preferring API over fallback."""
         if self._check_api_health() and self.client:
+            key = (symbol, limit)
+            now = time.monotonic()
+            cached = self._history_cache.get(key)
+            if cached is not None and now - cached[0] < self._cache_ttl:
+                self._history_cache.move_to_end(key)
+                return cached[1]
             history = self.client.get_price_history(symbol, limit)
             if history:
+                self._history_cache[key] = (now, history)
+                self._history_cache.move_to_end(key)
+                if len(self._history_cache) > self._history_cache_size:
+                    self._history_cache.popitem(last=False)
                 return history
         
         # Fallback to local history
@@ -345,23 +380,23 @@ class HybridPriceService:
         Args:
             active_assets: List of Asset model instances from database
         """
-        # Get current symbols in price service
-        current_symbols = set(self.fallback.get_symbols())
-        db_symbols = {asset.symbol for asset in active_assets}
+        db_assets = {asset.symbol: asset for asset in active_assets}
+        current = self.fallback.assets
         
         # Add new assets or update existing ones with drift
-        for asset in active_assets:
-            if asset.symbol not in current_symbols:
+        for symbol, asset in db_assets.items():
+            drift = getattr(asset, 'drift', 0.0)  # Safe access for backward compatibility
+            if symbol in current:
+                # Update drift for existing assets (in case it changed)
+                current[symbol]['drift'] = drift
+            else:
                 self.fallback.add_asset(
-                    symbol=asset.symbol,
+                    symbol=symbol,
                     initial_price=asset.initial_price,
                     volatility=asset.volatility,
-                    drift=getattr(asset, 'drift', 0.0)  # Safe access for backward compatibility
+                    drift=drift
                 )
-            else:
-                # Update drift for existing assets (in case it changed)
-                self.fallback.assets[asset.symbol]['drift'] = getattr(asset, 'drift', 0.0)
         
         # Remove assets no longer in database
-        for symbol in current_symbols - db_symbols:
-            self.fallback.remove_asset(symbol)
\ No newline at end of file
+        for symbol in [symbol for symbol in current if symbol not in db_assets]:
+            self.fallback.remove_asset(symbol)
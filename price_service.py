@@ -6,11 +6,14 @@ from flask import Flask, jsonify, request
 import numpy as np
 import threading
 import time
-import json
+from collections import deque
 from datetime import datetime
 import os
 import logging
 
+import json_utils
+from json_utils import FastJSONProvider
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,12 +24,20 @@ logger = logging.getLogger(__name__)
 class PriceService:
     """Service for managing asset prices and price history."""
     
+    SAVE_INTERVAL = 10  # seconds between checkpoints written by the update loop
+    
     def __init__(self, config=None):
         """Initialize the price service with asset configuration."""
         self.config = config or self._get_default_config()
         self.assets = {}
         self.running = False
         self.update_thread = None
+        self._last_save_monotonic = 0.0
+        self._gbm_cache = None  # (symbols, drift term, diffusion term) for the last set of stepped assets
+        # Read-only {symbol: {'price', 'last_update'}} map, replaced wholesale by writers
+        self._price_snapshot = {}
+        self._price_snapshot_json = '{}'  # The snapshot pre-serialized for /prices
+        self.snapshot_version = 0  # Bumped on every publish; prices and history are unchanged while it holds
         self._initialize_assets()
     
     def _get_default_config(self):
@@ -62,28 +73,51 @@ class PriceService:
                     'price': config_data['price'],
                     'volatility': config_data['volatility'],
                     'drift': config_data.get('drift', 0.0),  # Default to 0.0 for backward compatibility
-                    'history': [],
+                    'history': self._new_history(),
                     'last_update': None
                 }
+        self._publish_prices()
+    
+    def _new_history(self, points=()):
+        """Return a bounded history buffer; appends past MAX_HISTORY_POINTS drop the oldest point."""
+        return deque(points, maxlen=self.config.get('MAX_HISTORY_POINTS', 100))
+    
+    @staticmethod
+    def _serializable(data):
+        """Copy of an asset record with its history as a plain list for JSON output."""
+        return dict(data, history=list(data['history']))
     
     def _load_price_data(self):
         """Load existing price data from file."""
         data_file = self.config.get('PRICE_DATA_FILE', 'price_data.json')
+        self._gbm_cache = None
         if os.path.exists(data_file):
             try:
-                with open(data_file, 'r') as f:
-                    self.assets = json.load(f)
-            except (json.JSONDecodeError, IOError):
+                with open(data_file, 'rb') as f:
+                    self.assets = json_utils.loads(f.read())
+                for data in self.assets.values():
+                    data['history'] = self._new_history(data.get('history') or ())
+            except (ValueError, IOError):
                 self.assets = {}
         else:
             self.assets = {}
     
     def _save_price_data(self):
-        """Save current price data to file."""
+        """Save current price data to file.
+
+        The data is written to a temporary file that then replaces the real one,
+        so a crash mid-write never leaves a truncated checkpoint behind.
+        """
         data_file = self.config.get('PRICE_DATA_FILE', 'price_data.json')
+        tmp_file = f"{data_file}.tmp"
         try:
-            with open(data_file, 'w') as f:
-                json.dump(self.assets, f, indent=2)
+            with open(tmp_file, 'w') as f:
+                f.write(json_utils.dumps(
+                    {symbol: self._serializable(data) for symbol, data in self.assets.items()}, indent=True
+                ))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, data_file)
         except IOError as e:
             logger.error(f"Error saving price data: {e}")
     
@@ -115,72 +149,101 @@ class PriceService:
     
     def _update_prices(self):
         """Update all asset prices using geometric Brownian motion with drift."""
-        timestamp = time.time() * 1000  # JavaScript-compatible timestamp
+        # JavaScript-compatible millisecond timestamp, truncated to the second to avoid
+        # sub-second duplicates (integer math, no float round-trip)
+        timestamp = time.time_ns() // 1_000_000_000 * 1000
         
-        # Round timestamp to nearest second to avoid sub-second duplicates
-        timestamp = int(timestamp / 1000) * 1000
+        # Skip symbols that already have a price for this timestamp (last_update is the newest point)
+        due = [
+            (symbol, data) for symbol, data in self.assets.items()
+            if data.get('last_update') != timestamp
+        ]
         
-        for symbol, data in self.assets.items():
-            # Skip if this timestamp already exists for this symbol
-            if (data.get('last_update') == timestamp or
-                (len(data['history']) > 0 and data['history'][-1]['time'] == timestamp)):
-                continue
-            
-            # Get parameters from config or asset data
-            volatility = data.get('volatility', 0.02)
-            drift = data.get('drift', 0.0)  # Default to 0.0 for backward compatibility
-            
-            # # Ensure |drift| <= sigma to prevent explosive price movements
-            # drift = max(-volatility, min(volatility, drift))
-            
-            # Use geometric Brownian motion with drift
+        if due:
+            # Use geometric Brownian motion with drift, one vectorized step for every asset
             # S(t+dt) = S(t) * exp((mu - 0.5*sigma^2)*dt + sigma*sqrt(dt)*Z)
             # where:
             #   mu = drift (mean return rate)
             #   sigma = volatility
             #   Z ~ N(0,1)
             
-            dt = 1.0  # 1 second time step
-            sigma = volatility
-            mu = drift
-            
-            # Generate random shock from standard normal
-            z = np.random.standard_normal()
+            n = len(due)
+            drift_term, diffusion_term = self._gbm_terms(due)
+            prices = np.fromiter((data['price'] for _, data in due), dtype=np.float64, count=n)
             
-            # Calculate log-return with drift
-            # The -0.5*sigma^2*dt term is the Itô correction
-            log_return = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z
-            
-            # Update price using exponential (geometric Brownian motion)
-            new_price = data['price'] * np.exp(log_return)
+            # Generate random shocks from standard normal
+            z = np.random.standard_normal(n)
             
-            # Ensure price stays positive (shouldn't go negative with GBM, but safety check)
-            data['price'] = max(new_price, 0.0)
-            data['last_update'] = timestamp
+            # Calculate log-returns with drift
+            log_return = drift_term + diffusion_term * z
             
-            # Add to history
-            price_record = {'time': timestamp, 'price': data['price']}
-            data['history'].append(price_record)
+            # Update prices using exponential (geometric Brownian motion)
+            # Ensure prices stay positive (shouldn't go negative with GBM, but safety check)
+            new_prices = np.maximum(prices * np.exp(log_return), 0.0).tolist()
             
-            # Trim history to maximum points
-            max_points = self.config.get('MAX_HISTORY_POINTS', 100)
-            if len(data['history']) > max_points:
-                data['history'] = data['history'][-max_points:]
+            for (_, data), price in zip(due, new_prices):
+                data['price'] = price
+                data['last_update'] = timestamp
+                
+                # Add to history (the bounded deque drops the oldest point itself)
+                data['history'].append({'time': timestamp, 'price': price})
+        
+        self._publish_prices()
         
-        # Periodically save data (every 10 updates)
-        if int(timestamp / 1000) % 10 == 0:
+        # Periodically save data, at most once per SAVE_INTERVAL
+        now = time.monotonic()
+        if now - self._last_save_monotonic >= self.SAVE_INTERVAL:
             self._save_price_data()
+            self._last_save_monotonic = now
+    
+    def _gbm_terms(self, due):
+        """Return the per-asset ``(mu - 0.5*sigma^2)*dt`` and ``sigma*sqrt(dt)`` arrays for ``due``.
+
+        Volatility and drift only change when assets are added, removed or reloaded,
+        so the arrays are cached until then or until a different set of assets is due.
+        """
+        symbols = tuple(symbol for symbol, _ in due)
+        cached = self._gbm_cache
+        if cached is None or cached[0] != symbols:
+            dt = 1.0  # 1 second time step
+            n = len(due)
+            sigma = np.fromiter((data.get('volatility', 0.02) for _, data in due), dtype=np.float64, count=n)
+            mu = np.fromiter((data.get('drift', 0.0) for _, data in due), dtype=np.float64, count=n)
+            # The -0.5*sigma^2*dt term is the Itô correction
+            cached = self._gbm_cache = (symbols, (mu - 0.5 * sigma**2) * dt, sigma * np.sqrt(dt))
+        return cached[1], cached[2]
+    
+    def _publish_prices(self):
+        """Build a new price snapshot and swap it in with a single assignment.
+
+        Request threads read the snapshot without locking; they always see either
+        the previous tick or the current one, never a half-updated map.
+        """
+        snapshot = {
+            symbol: {'price': data['price'], 'last_update': data.get('last_update')}
+            for symbol, data in self.assets.items()
+        }
+        self._price_snapshot_json = json_utils.dumps(snapshot)
+        self._price_snapshot = snapshot
+        self.snapshot_version += 1
     
     def get_current_prices(self):
-        """Get current prices for all assets."""
-        return {symbol: {'price': data['price'], 'last_update': data.get('last_update')} 
-                for symbol, data in self.assets.items()}
+        """Get current prices for all assets (a shared snapshot; treat as read-only)."""
+        return self._price_snapshot
+    
+    def get_current_prices_json(self):
+        """Get current prices for all assets as a JSON document, serialized once per tick."""
+        return self._price_snapshot_json
+    
+    def get_current_price(self, symbol):
+        """Get the current price record for one asset, or None if it is unknown."""
+        return self._price_snapshot.get(symbol)
     
     def get_price_history(self, symbol=None, limit=None):
         """Get price history for a specific symbol or all symbols."""
         if symbol:
             if symbol in self.assets:
-                history = self.assets[symbol]['history']
+                history = list(self.assets[symbol]['history'])
                 if limit:
                     history = history[-limit:]
                 return {symbol: history}
@@ -190,7 +253,7 @@ class PriceService:
             # Return all histories
             result = {}
             for sym, data in self.assets.items():
-                history = data['history']
+                history = list(data['history'])
                 if limit:
                     history = history[-limit:]
                 result[sym] = history
@@ -199,8 +262,9 @@ class PriceService:
     def get_asset_info(self, symbol=None):
         """Get complete asset information."""
         if symbol:
-            return self.assets.get(symbol, {})
-        return self.assets
+            data = self.assets.get(symbol)
+            return self._serializable(data) if data else {}
+        return {sym: self._serializable(data) for sym, data in self.assets.items()}
     
     def add_asset(self, symbol, initial_price, volatility=0.02, drift=0.0):
         """Add a new asset to the service."""
@@ -208,15 +272,19 @@ class PriceService:
             'price': initial_price,
             'volatility': volatility,
             'drift': drift,
-            'history': [],
+            'history': self._new_history(),
             'last_update': None
         }
+        self._gbm_cache = None
+        self._publish_prices()
         self._save_price_data()
     
     def remove_asset(self, symbol):
         """Remove an asset from the service."""
         if symbol in self.assets:
             del self.assets[symbol]
+            self._gbm_cache = None
+            self._publish_prices()
             self._save_price_data()
             return True
         return False
@@ -225,6 +293,7 @@ class PriceService:
 def create_price_api(price_service):
     """Create a Flask API for the price service."""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)  # jsonify() below serializes with orjson when installed
     
     @app.route('/health')
     def health():
@@ -234,22 +303,46 @@ def create_price_api(price_service):
     @app.route('/prices')
     def get_prices():
         """Get current prices for all assets."""
-        return jsonify(price_service.get_current_prices())
+        return app.response_class(price_service.get_current_prices_json(), mimetype='application/json')
     
     @app.route('/prices/<symbol>')
     def get_price(symbol):
         """Get current price for a specific asset."""
         symbol = symbol.upper()
-        prices = price_service.get_current_prices()
-        if symbol in prices:
-            return jsonify({symbol: prices[symbol]})
+        price = price_service.get_current_price(symbol)
+        if price is not None:
+            return jsonify({symbol: price})
         return jsonify({'error': 'Asset not found'}), 404
     
+    # Serialized /history bodies for the current snapshot version, keyed by limit
+    history_bodies = {'version': None, 'bodies': {}}
+    # Versions restart with the process, so tag ETags with the start time too
+    started_at = int(time.time())
+    
     @app.route('/history')
     def get_all_history():
-        """Get price history for all assets."""
+        """Get price history for all assets.
+
+        Responses carry an ETag tied to the price snapshot, so pollers that already
+        hold the current history get a 304 and the body is serialized once per tick.
+        """
         limit = request.args.get('limit', type=int)
-        return jsonify(price_service.get_price_history(limit=limit))
+        version = price_service.snapshot_version
+        etag = f"{started_at}-{version}-{limit}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        if history_bodies['version'] != version:
+            history_bodies['version'] = version
+            history_bodies['bodies'] = {}
+        body = history_bodies['bodies'].get(limit)
+        if body is None:
+            body = history_bodies['bodies'][limit] = app.json.dumps(price_service.get_price_history(limit=limit))
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
     
     @app.route('/history/<symbol>')
     def get_symbol_history(symbol):
@@ -24,6 +24,12 @@ def replace_all_assets():
             all_assets = Asset.query.all()
             print(f"Found {len(all_assets)} existing assets")
             
+            # Load every portfolio once and work on parsed maps; each is written back once at the end
+            portfolios = Portfolio.query.all()
+            holdings_by_portfolio = {p.id: p.get_holdings() for p in portfolios}
+            positions_by_portfolio = {p.id: p.get_position_info() for p in portfolios}
+            changed = set()
+            
             # Mark all assets as inactive and settle any holdings
             settled_count = 0
             for asset in all_assets:
@@ -33,30 +39,27 @@ def replace_all_assets():
                     print(f"  Marked {asset.symbol} as inactive")
                     
                     # Return value to users who hold this asset
-                    portfolios = Portfolio.query.all()
                     for portfolio in portfolios:
-                        holdings = portfolio.get_holdings()
+                        holdings = holdings_by_portfolio[portfolio.id]
                         if asset.id in holdings and holdings[asset.id] > 0:
-                            quantity = holdings[asset.id]
+                            quantity = holdings.pop(asset.id)
                             value = quantity * asset.current_price
                             
                             # Return cash
                             portfolio.cash += value
                             
-                            # Remove holding
-                            del holdings[asset.id]
-                            portfolio.set_holdings(holdings)
-                            
                             # Remove position info
-                            position_info = portfolio.get_position_info()
-                            if asset.id in position_info:
-                                del position_info[asset.id]
-                                portfolio.set_position_info(position_info)
+                            positions_by_portfolio[portfolio.id].pop(asset.id, None)
+                            changed.add(portfolio.id)
                             
                             print(f"    Settled {quantity} shares for user {portfolio.user_id} at ${asset.current_price:.2f} = ${value:.2f}")
                             settled_count += 1
             
-            db.session.commit()
+            for portfolio in portfolios:
+                if portfolio.id in changed:
+                    portfolio.set_holdings(holdings_by_portfolio[portfolio.id])
+                    portfolio.set_position_info(positions_by_portfolio[portfolio.id])
+            
             print(f"\nSettled {settled_count} positions")
             
             # Create 16 new assets with updated expiration times
@@ -7,8 +7,12 @@ This will:
 3. Create exactly 16 new assets with 5-480 minute expiration times
 """
 import os
+from collections import defaultdict
+
 os.environ.setdefault('FLASK_ENV', 'development')
 
+from sqlalchemy import func, insert, select
+
 from app import create_app
 from models import db, Asset, Portfolio, Settlement, current_utc
 
@@ -41,63 +45,69 @@ def reset_assets():
             
             # Step 3: Mark all assets as inactive and settle positions
             print(f"\nDeactivating all {len(all_assets)} assets...")
+            
+            # Decode each portfolio's holdings once and index holders by asset id
+            portfolios = Portfolio.query.all()
+            holdings_cache = {p.id: p.get_holdings() for p in portfolios}
+            posinfo_cache = {p.id: p.get_position_info() for p in portfolios}
+            holders_by_asset = defaultdict(list)
+            for portfolio in portfolios:
+                for asset_id, quantity in holdings_cache[portfolio.id].items():
+                    if quantity > 0:
+                        holders_by_asset[asset_id].append((portfolio, quantity))
+            changed_portfolios = {}
+            
             settled_count = 0
+            settlement_rows = []
             for asset in all_assets:
                 if asset.is_active:
                     # Mark as expired with current price as final
                     asset.expire(final_price=asset.current_price)
                     
                     # Return value to users who hold this asset
-                    portfolios = Portfolio.query.all()
-                    for portfolio in portfolios:
-                        holdings = portfolio.get_holdings()
-                        if asset.id in holdings and holdings[asset.id] > 0:
-                            quantity = holdings[asset.id]
-                            value = quantity * asset.current_price
-                            
-                            # Create settlement record
-                            settlement = Settlement(
-                                user_id=portfolio.user_id,
-                                asset_id=asset.id,
-                                legacy_symbol=asset.symbol,
-                                quantity=quantity,
-                                settlement_price=asset.current_price,
-                                settlement_value=value
-                            )
-                            db.session.add(settlement)
-                            
-                            # Return cash
-                            portfolio.cash += value
-                            
-                            # Remove holding
-                            del holdings[asset.id]
-                            portfolio.set_holdings(holdings)
-                            
-                            # Remove position info
-                            position_info = portfolio.get_position_info()
-                            if asset.id in position_info:
-                                del position_info[asset.id]
-                                portfolio.set_position_info(position_info)
-                            
-                            print(f"  ✓ Settled {quantity} {asset.symbol} for user {portfolio.user_id}: ${value:.2f}")
-                            settled_count += 1
+                    for portfolio, quantity in holders_by_asset.get(asset.id, ()):
+                        value = quantity * asset.current_price
+                        
+                        # Queue settlement record; all rows are inserted together below
+                        settlement_rows.append({
+                            'user_id': portfolio.user_id,
+                            'asset_id': asset.id,
+                            'legacy_symbol': asset.symbol,
+                            'quantity': quantity,
+                            'settlement_price': asset.current_price,
+                            'settlement_value': value,
+                            'color': asset.color
+                        })
+                        
+                        # Return cash
+                        portfolio.cash += value
+                        
+                        # Remove holding and position info; written back once below
+                        del holdings_cache[portfolio.id][asset.id]
+                        posinfo_cache[portfolio.id].pop(asset.id, None)
+                        changed_portfolios[portfolio.id] = portfolio
+                        
+                        print(f"  ✓ Settled {quantity} {asset.symbol} for user {portfolio.user_id}: ${value:.2f}")
+                        settled_count += 1
+            
+            for portfolio_id, portfolio in changed_portfolios.items():
+                portfolio.set_holdings(holdings_cache[portfolio_id])
+                portfolio.set_position_info(posinfo_cache[portfolio_id])
             
+            if settlement_rows:
+                db.session.execute(insert(Settlement), settlement_rows)
             db.session.commit()
             print(f"\n✓ Deactivated all assets and settled {settled_count} positions")
             
             # Step 4: Create exactly 16 new assets
             print(f"\nCreating 16 new assets with minute-based expiration...")
-            new_assets = []
-            for i in range(16):
-                asset = Asset.create_new_asset(
-                    initial_price=100.0,
-                    volatility=None,  # Random 0.1% - 20%
-                    minutes_to_expiry=None  # Random 5-480 minutes (exponential distribution)
-                )
-                db.session.add(asset)
-                new_assets.append(asset)
-                
-                time_to_expiry_minutes = (asset.expires_at - current_utc()).total_seconds() / 60
+            # Draw the whole batch at once; it is inserted together at the commit below
+            new_assets = Asset.create_batch(16, initial_price=100.0)
+            db.session.add_all(new_assets)
+            
+            now = current_utc()
+            for i, asset in enumerate(new_assets):
+                time_to_expiry_minutes = (asset.expires_at - now).total_seconds() / 60
                 print(f"  {i+1:2d}. {asset.symbol}: "
                       f"volatility={asset.volatility*100:5.2f}%, "
                       f"expires in {time_to_expiry_minutes:6.1f} minutes "
@@ -106,8 +116,10 @@ def reset_assets():
             
             db.session.commit()
             
-            # Step 5: Verify
-            final_active = Asset.query.filter_by(is_active=True).count()
+            # Step 5: Verify against the committed rows with a single COUNT
+            final_active = db.session.execute(
+                select(func.count()).select_from(Asset).where(Asset.is_active == True)
+            ).scalar()
             
             print("\n" + "="*80)
             print("RESET COMPLETE")
@@ -0,0 +1,42 @@
+"""
+Schema version bookkeeping for the standalone migrate_* scripts.
+
+SQLite exposes a free integer slot in its header (PRAGMA user_version) that
+lets a migration short-circuit in O(1) instead of re-inspecting table
+metadata on every run. Other backends have no equivalent, so callers fall
+back to their own column checks when the flags are unavailable.
+
+The migrations are independent and may run in any order, so each one owns a
+bit of user_version rather than sharing a single increasing number.
+"""
+from typing import Optional
+
+from sqlalchemy import text
+
+# One bit per migration; never reuse a bit once it has shipped
+COLOR_MIGRATION = 1 << 0
+DRIFT_MIGRATION = 1 << 1
+
+
+def get_schema_version(session) -> Optional[int]:
+    """Return the recorded SQLite user_version, or None on other backends."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return None
+    return int(session.execute(text('PRAGMA user_version')).scalar() or 0)
+
+
+def migration_applied(session, flag: int) -> Optional[bool]:
+    """Return whether ``flag`` is recorded as applied, or None on other backends."""
+    version = get_schema_version(session)
+    if version is None:
+        return None
+    return bool(version & flag)
+
+
+def mark_migration_applied(session, flag: int) -> None:
+    """Record that the migration owning ``flag`` has been applied (SQLite only)."""
+    version = get_schema_version(session)
+    if version is None or version & flag:
+        return
+    # PRAGMA statements do not accept bound parameters
+    session.execute(text(f'PRAGMA user_version = {int(version | flag)}'))
@@ -0,0 +1,55 @@
+"""
+Readiness polling shared by start_services.py and services_startup_test.py.
+
+Both scripts launch the price service and web app as subprocesses and wait for
+them to answer HTTP before moving on.
+"""
+import logging
+import socket
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("service_probe")
+
+# One keep-alive session for every probe; the polling loop does its own retrying
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0))
+
+
+def wait_for_http(url: str, name: str, max_wait: float = 30.0, initial_delay: float = 0.05) -> bool:
+    """Poll an HTTP endpoint until it responds without a server error.
+
+    The delay between attempts starts at ``initial_delay`` and doubles up to one second.
+    Each attempt first checks that the port accepts TCP connections, and only then
+    issues the HTTP request that confirms the application itself is serving.
+    """
+    parsed = urlsplit(url)
+    address = (parsed.hostname, parsed.port or 80)
+    deadline = time.monotonic() + max_wait
+    delay = initial_delay
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with socket.create_connection(address, timeout=0.5):
+                pass
+        except OSError as exc:
+            logger.debug("Attempt %d to connect to %s failed: %s", attempt, name, exc)
+        else:
+            try:
+                response = http_session.get(url, timeout=2)
+                if response.status_code < 500:
+                    logger.info("%s is reachable (attempt %d, status %d)", name, attempt, response.status_code)
+                    return True
+                logger.warning("%s responded with status %d (attempt %d)", name, response.status_code, attempt)
+            except requests.RequestException as exc:
+                logger.debug("Attempt %d to reach %s failed: %s", attempt, name, exc)
+        if time.monotonic() + delay > deadline:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    logger.error("%s did not become available at %s", name, url)
+    return False
@@ -6,18 +6,19 @@ import sys
 import time
 from typing import List, Optional
 
-import requests
-
 import logging
 
+from service_probe import http_session, wait_for_http
+
 
 logger = logging.getLogger("services_startup_test")
-if not logger.handlers:
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+for named_logger in (logger, logging.getLogger("service_probe")):
+    if not named_logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        handler.setFormatter(formatter)
+        named_logger.addHandler(handler)
+    named_logger.setLevel(logging.INFO)
 
 
 class ManagedProcess:
@@ -49,22 +50,6 @@ class ManagedProcess:
             self.process = None
 
 
-def wait_for_http(url: str, name: str, attempts: int = 30, delay: float = 1.0) -> bool:
-    """Poll an HTTP endpoint until it responds without connection errors."""
-    for attempt in range(1, attempts + 1):
-        try:
-            response = requests.get(url, timeout=2)
-            if response.status_code < 500:
-                logger.info("%s is reachable (attempt %d, status %d)", name, attempt, response.status_code)
-                return True
-            logger.warning("%s responded with status %d (attempt %d)", name, response.status_code, attempt)
-        except requests.RequestException as exc:
-            logger.debug("Attempt %d to reach %s failed: %s", attempt, name, exc)
-        time.sleep(delay)
-    logger.error("%s did not become available at %s", name, url)
-    return False
-
-
 def main() -> int:
     base_env = os.environ.copy()
     base_env.setdefault("FLASK_ENV", "development")
@@ -90,6 +75,7 @@ def main() -> int:
     processes = [price_service, web_app]
 
     try:
+        # The web app caches its price API health check, so boot it only once the API answers
         price_service.start()
         if not wait_for_http("http://localhost:5001/health", "Price service"):
             return 1
@@ -99,7 +85,7 @@ def main() -> int:
             return 1
 
         # Verify that the price API is returning data (ensures real generator is active)
-        prices = requests.get("http://localhost:5001/prices", timeout=3).json()
+        prices = http_session.get("http://localhost:5001/prices", timeout=3).json()
         if not prices:
             logger.error("Price service returned no price data")
             return 1
@@ -114,6 +100,7 @@ def main() -> int:
         logger.info("Interrupted by user")
         return 0
     finally:
+        http_session.close()
         for proc in processes:
             proc.terminate()
 
@@ -4,12 +4,12 @@ Martingale Services Startup Script
 Starts both the price service and web application.
 """
 import subprocess
-import time
-import requests
 import sys
 import signal
 import logging
 
+from service_probe import http_session, wait_for_http
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,20 +22,6 @@ def start_price_service():
     logger.info("Starting price service...")
     return subprocess.Popen([sys.executable, 'price_service.py'])
 
-def wait_for_price_service(max_attempts=10):
-    """Wait for the price service to become available."""
-    for attempt in range(max_attempts):
-        try:
-            response = requests.get('http://localhost:5001/health', timeout=1)
-            if response.status_code == 200:
-                logger.info(f"✓ Price service is ready (attempt {attempt + 1})")
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        logger.debug(f"Waiting for price service... (attempt {attempt + 1}/{max_attempts})")
-        time.sleep(1)
-    return False
-
 def start_web_app():
     """Start the web application."""
     logger.info("Starting web application...")
@@ -47,16 +33,16 @@ def main():
     web_process = None
     
     try:
-        # Start price service
+        # The web app caches its price API health check, so it must not boot before the API answers
         price_process = start_price_service()
-        
-        # Wait for price service to be ready
-        if not wait_for_price_service():
+        if not wait_for_http('http://localhost:5001/health', 'Price service'):
             logger.error("❌ Price service failed to start within timeout")
             return 1
         
-        # Start web application
         web_process = start_web_app()
+        if not wait_for_http('http://localhost:5000/', 'Web application'):
+            logger.error("❌ Web application failed to start within timeout")
+            return 1
         
         logger.info("\n🚀 Martingale Trading Platform is running!")
         logger.info("📊 Price Service: http://localhost:5001")
@@ -72,6 +58,8 @@ def main():
         logger.error(f"❌ Error: {e}")
         return 1
     finally:
+        http_session.close()
+        
         # Clean up processes
         if web_process:
             try:
@@ -296,7 +296,7 @@ def run_all_tests():
 
 if __name__ == '__main__':
     config_name = os.environ.get('FLASK_ENV', 'development')
-    app.config.from_object(config[config_name])
+    app.config.update(config[config_name].as_mapping())
     
     success = run_all_tests()
     sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+"""
+Tests for the standalone migrate_* scripts and their schema version flags.
+
+Each test builds a throwaway SQLite database holding an assets table from
+before the color and drift columns existed, then runs the migrations in turn.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask import Flask
+from sqlalchemy import text
+
+from config import config
+from models import db
+from schema_version import COLOR_MIGRATION, DRIFT_MIGRATION, get_schema_version
+import migrate_add_color
+import migrate_add_drift
+
+LEGACY_ASSETS_TABLE = """
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY,
+    symbol VARCHAR(10) NOT NULL,
+    initial_price FLOAT NOT NULL,
+    current_price FLOAT NOT NULL,
+    volatility FLOAT,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL,
+    is_active BOOLEAN NOT NULL,
+    final_price FLOAT,
+    settled_at DATETIME
+)
+"""
+
+
+class TestMigrationOrder(unittest.TestCase):
+    """The color and drift migrations must both apply whichever runs first."""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.app = Flask(__name__)
+        self.app.config.update(config['development'].as_mapping())
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.db_path}'
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.execute(text(LEGACY_ASSETS_TABLE))
+            db.session.execute(text(
+                "INSERT INTO assets (symbol, initial_price, current_price, volatility, "
+                "created_at, expires_at, is_active) "
+                "VALUES ('OLD', 100, 100, 0.02, '2024-01-01', '2024-01-02', 1)"
+            ))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.db_path)
+
+    def run_migrations(self, *migrations):
+        for migrate in migrations:
+            module = sys.modules[migrate.__module__]
+            with mock.patch.object(module, 'create_app', return_value=self.app):
+                migrate()
+
+    def assert_fully_migrated(self):
+        with self.app.app_context():
+            columns = {row[1] for row in db.session.execute(text('PRAGMA table_info(assets)'))}
+            self.assertIn('color', columns)
+            self.assertIn('drift', columns)
+            self.assertEqual(get_schema_version(db.session), COLOR_MIGRATION | DRIFT_MIGRATION)
+            color = db.session.execute(text("SELECT color FROM assets WHERE symbol = 'OLD'")).scalar()
+            self.assertTrue(color)
+
+    def test_color_then_drift(self):
+        self.run_migrations(migrate_add_color.migrate_add_color, migrate_add_drift.migrate_add_drift)
+        self.assert_fully_migrated()
+
+    def test_drift_then_color(self):
+        self.run_migrations(migrate_add_drift.migrate_add_drift, migrate_add_color.migrate_add_color)
+        self.assert_fully_migrated()
+
+    def test_color_still_applies_after_drift_recorded(self):
+        # Drift column already present: the drift run only records its flag
+        with self.app.app_context():
+            db.session.execute(text('ALTER TABLE assets ADD COLUMN drift FLOAT DEFAULT 0.0'))
+            db.session.commit()
+        self.run_migrations(migrate_add_drift.migrate_add_drift)
+        with self.app.app_context():
+            self.assertEqual(get_schema_version(db.session), DRIFT_MIGRATION)
+        self.run_migrations(migrate_add_color.migrate_add_color)
+        self.assert_fully_migrated()
+
+    def test_rerun_short_circuits(self):
+        self.run_migrations(migrate_add_drift.migrate_add_drift, migrate_add_color.migrate_add_color)
+        with mock.patch.object(migrate_add_drift, 'check_column_exists') as check:
+            self.run_migrations(migrate_add_drift.migrate_add_drift)
+        check.assert_not_called()
+        self.assert_fully_migrated()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+"""
+Behaviour tests for model helpers that cache, batch or guard database access.
+
+Each test case runs against its own in-memory SQLite database so the
+development database used by the script-style suites is left untouched.
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask import Flask
+from sqlalchemy import event, update
+from sqlalchemy.exc import InvalidRequestError
+
+import json_utils
+from config import config
+from models import (
+    db, Asset, Portfolio, PriceData, Settlement, Transaction, User,
+    _raise_on_lazy_load, enable_lazy_load_guard,
+)
+
+
+def make_test_app():
+    """Build a Flask app bound to a fresh in-memory database."""
+    app = Flask(__name__)
+    app.config.update(config['development'].as_mapping())
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    db.init_app(app)
+    return app
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Creates the schema in a fresh database and pushes an app context."""
+
+    def setUp(self):
+        self.app = make_test_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+
+class TestPriceDataSeed(DatabaseTestCase):
+    """Reseeding PriceData resets prices and the legacy history column."""
+
+    def test_reseed_clears_history(self):
+        from init_database import seed_price_data
+
+        db.session.add(PriceData(symbol='HIS', current_price=100.0, history='[{"time": 1.0, "price": 101.0}]'))
+        db.session.commit()
+
+        seed_price_data({'ASSETS': {'HIS': {'price': 50.0, 'volatility': 0.03}}})
+        db.session.commit()
+        db.session.expire_all()
+
+        reseeded = PriceData.query.filter_by(symbol='HIS').one()
+        self.assertEqual(reseeded.history, '[]')
+        self.assertEqual(reseeded.current_price, 50.0)
+
+
+class TestPortfolioParseCache(DatabaseTestCase):
+    """Holdings and position info are parsed once per column value."""
+
+    def setUp(self):
+        super().setUp()
+        user = User(username='cache_user', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        self.portfolio = Portfolio(user_id=user.id, cash=1000.0)
+        db.session.add(self.portfolio)
+        db.session.commit()
+
+    def test_repeat_reads_parse_once(self):
+        self.portfolio.holdings = '{"1": 2.5, "2": 1}'
+        self.portfolio.position_info = '{"1": {"total_cost": 250, "total_quantity": 2.5}}'
+        with mock.patch.object(json_utils, 'loads', wraps=json_utils.loads) as loads:
+            for _ in range(3):
+                self.assertEqual(self.portfolio.get_holdings(), {1: 2.5, 2: 1.0})
+                self.assertEqual(
+                    self.portfolio.get_position_info(),
+                    {1: {'total_cost': 250.0, 'total_quantity': 2.5}},
+                )
+        self.assertEqual(loads.call_count, 2)
+
+    def test_set_primes_cache(self):
+        self.portfolio.set_holdings({3: 4})
+        with mock.patch.object(json_utils, 'loads', wraps=json_utils.loads) as loads:
+            self.assertEqual(self.portfolio.get_holdings(), {3: 4.0})
+        loads.assert_not_called()
+        self.assertEqual(json_utils.loads(self.portfolio.holdings), {'3': 4.0})
+
+    def test_returned_maps_are_copies(self):
+        self.portfolio.set_holdings({1: 1.0})
+        self.portfolio.set_position_info({1: {'total_cost': 10.0, 'total_quantity': 1.0}})
+
+        holdings = self.portfolio.get_holdings()
+        holdings[1] = 99.0
+        positions = self.portfolio.get_position_info()
+        positions[1]['total_cost'] = 99.0
+
+        self.assertEqual(self.portfolio.get_holdings(), {1: 1.0})
+        self.assertEqual(self.portfolio.get_position_info()[1]['total_cost'], 10.0)
+
+    def test_cache_follows_column_changes(self):
+        self.portfolio.set_holdings({1: 1.0})
+        db.session.commit()
+        # Another writer changes the stored text behind this instance's back
+        db.session.execute(
+            update(Portfolio).where(Portfolio.id == self.portfolio.id).values(holdings='{"5": 7}')
+        )
+        db.session.commit()
+        db.session.refresh(self.portfolio)
+        self.assertEqual(self.portfolio.get_holdings(), {5: 7.0})
+
+
+class TestAssetSymbolCache(DatabaseTestCase):
+    """Symbol lookups for holdings hit the database once per asset id."""
+
+    def setUp(self):
+        super().setUp()
+        user = User(username='symbol_user', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        self.assets = Asset.create_batch(2, initial_price=100.0)
+        db.session.add_all(self.assets)
+        db.session.flush()
+        self.portfolio = Portfolio(user_id=user.id, cash=1000.0)
+        self.portfolio.set_holdings({asset.id: 1.0 + i for i, asset in enumerate(self.assets)})
+        db.session.add(self.portfolio)
+        db.session.commit()
+        self.expected = {asset.symbol: 1.0 + i for i, asset in enumerate(self.assets)}
+        self.portfolio.get_holdings()  # Reload the expired row so only symbol lookups are counted
+
+    def count_queries(self, func):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_second_lookup_skips_query(self):
+        result, queries = self.count_queries(self.portfolio.get_holdings_by_symbol)
+        self.assertEqual(result, self.expected)
+        self.assertEqual(queries, 1)
+
+        result, queries = self.count_queries(self.portfolio.get_holdings_by_symbol)
+        self.assertEqual(result, self.expected)
+        self.assertEqual(queries, 0)
+
+    def test_deleted_asset_is_forgotten(self):
+        self.portfolio.get_holdings_by_symbol()
+        gone = self.assets[0]
+        db.session.delete(gone)
+        db.session.commit()
+
+        self.assertNotIn(gone.symbol, self.portfolio.get_holdings_by_symbol())
+
+    def test_rollback_clears_cache(self):
+        self.portfolio.get_holdings_by_symbol()
+        db.session.rollback()
+        self.portfolio.get_holdings()
+
+        result, queries = self.count_queries(self.portfolio.get_holdings_by_symbol)
+        self.assertEqual(result, self.expected)
+        self.assertEqual(queries, 1)
+
+
+class TestLazyLoadGuard(DatabaseTestCase):
+    """RAISE_ON_LAZY_LOAD rejects lazy relationship loads but not ORM writes."""
+
+    def setUp(self):
+        super().setUp()
+        user = User(username='guard_user', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        self.asset = Asset.create_new_asset(initial_price=100.0, minutes_to_expiry=60)
+        db.session.add(self.asset)
+        db.session.flush()
+        portfolio = Portfolio(user_id=user.id, cash=1000.0)
+        portfolio.set_holdings({self.asset.id: 2.0})
+        portfolio.set_position_info({self.asset.id: {'total_cost': 200.0, 'total_quantity': 2.0}})
+        db.session.add(portfolio)
+        db.session.commit()
+        self.user_id = user.id
+        enable_lazy_load_guard()
+
+    def tearDown(self):
+        event.remove(db.session, 'do_orm_execute', _raise_on_lazy_load)
+        super().tearDown()
+
+    def test_settlement_and_price_update_run_with_guard(self):
+        from asset_manager import AssetManager
+
+        db.session.execute(update(Asset), [{'id': self.asset.id, 'current_price': 90.0}])
+        db.session.commit()
+
+        self.asset.expire(final_price=90.0)
+        db.session.commit()
+        stats = AssetManager(self.app.config).settle_expired_positions([self.asset])
+
+        self.assertEqual(stats['positions_settled'], 1)
+        self.assertEqual(Settlement.query.count(), 1)
+        self.assertEqual(Transaction.query.filter_by(type='settlement').count(), 1)
+        portfolio = Portfolio.query.filter_by(user_id=self.user_id).one()
+        self.assertEqual(portfolio.cash, 1000.0 + 2.0 * 90.0)
+        self.assertEqual(portfolio.get_holdings(), {})
+
+    def test_lazy_relationship_load_raises(self):
+        db.session.expunge_all()
+        user = db.session.get(User, self.user_id)
+        with self.assertRaises(InvalidRequestError):
+            user.transactions
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for the price service HTTP API.
+
+Views are called inside a request context, so no price thread or network
+port is needed.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from price_service import PriceService, create_price_api
+
+
+class TestHistoryETag(unittest.TestCase):
+    """/history revalidates against the price snapshot version."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.service = PriceService({
+            'ASSETS': {
+                'AAA': {'price': 100, 'volatility': 0.05},
+                'BBB': {'price': 50, 'volatility': 0.02},
+            },
+            'MAX_HISTORY_POINTS': 100,
+            'PRICE_UPDATE_INTERVAL': 1,
+            'PRICE_DATA_FILE': os.path.join(self.tmpdir.name, 'price_data.json'),
+        })
+        self.app = create_price_api(self.service)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_history(self, query='', etag=None):
+        headers = {'If-None-Match': f'"{etag}"'} if etag else {}
+        with self.app.test_request_context(f'/history{query}', headers=headers):
+            return self.app.view_functions['get_all_history']()
+
+    def test_matching_etag_returns_304(self):
+        first = self.get_history()
+        etag, _ = first.get_etag()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(etag)
+
+        second = self.get_history(etag=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.get_data(), b'')
+        self.assertEqual(second.get_etag()[0], etag)
+
+    def test_price_tick_invalidates_etag(self):
+        first = self.get_history()
+        etag, _ = first.get_etag()
+
+        self.service._update_prices()
+
+        second = self.get_history(etag=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.get_etag()[0], etag)
+        history = second.get_json()
+        self.assertEqual(set(history), {'AAA', 'BBB'})
+        self.assertEqual(len(history['AAA']), 1)
+
+    def test_etag_depends_on_limit(self):
+        unlimited = self.get_history()
+        limited = self.get_history('?limit=5', etag=unlimited.get_etag()[0])
+        self.assertEqual(limited.status_code, 200)
+        self.assertNotEqual(limited.get_etag()[0], unlimited.get_etag()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()